@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 import asyncio
+import json
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+from src.services.call_registry import call_registry
+from src.services.campaign_service import CampaignDialer
 from src.services.outbound_service import OutboundCallService
 from src.utils.logger import setup_logger
 from loguru import logger
@@ -12,6 +16,7 @@ setup_logger()
 app = FastAPI(title="LiveKit Voice Agent API", version="1.0.0")
 
 outbound_service = OutboundCallService()
+campaign_dialer = CampaignDialer(outbound_service)
 
 class OutboundCallRequest(BaseModel):
     phone_number: str
@@ -19,9 +24,15 @@ class OutboundCallRequest(BaseModel):
 
 class CallResponse(BaseModel):
     success: bool
+    call_id: Optional[str] = None
     room_name: Optional[str] = None
     message: str
 
+class CampaignRequest(BaseModel):
+    phone_numbers: List[str]
+    agent_name: Optional[str] = "laura-sdr"
+    trunk_id: Optional[str] = None
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "livekit-voice-agent"}
@@ -39,6 +50,7 @@ async def make_outbound_call(request: OutboundCallRequest):
         if room_name:
             return CallResponse(
                 success=True,
+                call_id=call_registry.by_room(room_name).call_id,
                 room_name=room_name,
                 message=f"Call initiated successfully to {request.phone_number}"
             )
@@ -65,6 +77,85 @@ async def end_call(room_name: str):
         logger.error(f"Error ending call: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/calls")
+async def list_calls(state: Optional[str] = None, phone_number: Optional[str] = None, limit: int = 100):
+    if phone_number:
+        records = call_registry.by_phone(phone_number)
+        if state:
+            records = [record for record in records if record.state == state]
+        records = records[:limit]
+    else:
+        records = call_registry.list(state=state, limit=limit)
+    return {"counts": call_registry.counts, "calls": [record.to_dict() for record in records]}
+
+@app.get("/calls/{call_id}")
+async def get_call(call_id: str):
+    record = call_registry.get(call_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Call not found")
+    return record.to_dict()
+
+@app.post("/calls/{call_id}/end")
+async def end_call_by_id(call_id: str):
+    if call_registry.get(call_id) is None:
+        raise HTTPException(status_code=404, detail="Call not found")
+    
+    success = await outbound_service.end_call_by_id(call_id)
+    if not success:
+        raise HTTPException(status_code=500, detail="Failed to end call")
+    return {"success": True, "call": call_registry.get(call_id).to_dict()}
+
+@app.post("/campaigns")
+async def create_campaign(request: CampaignRequest):
+    if not request.phone_numbers:
+        raise HTTPException(status_code=400, detail="phone_numbers is empty")
+    
+    try:
+        campaign = campaign_dialer.start(
+            request.phone_numbers,
+            agent_name=request.agent_name,
+            trunk_id=request.trunk_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return campaign.progress()
+
+@app.get("/campaigns")
+async def list_campaigns():
+    return [campaign.progress() for campaign in campaign_dialer.campaigns.values()]
+
+@app.get("/campaigns/{campaign_id}")
+async def get_campaign(campaign_id: str, include_results: bool = False):
+    campaign = campaign_dialer.get(campaign_id)
+    if campaign is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    progress = campaign.progress()
+    if include_results:
+        progress["results"] = campaign.results
+    return progress
+
+@app.get("/campaigns/{campaign_id}/events")
+async def stream_campaign(campaign_id: str):
+    """Server-sent events with a progress snapshot on every change until the campaign ends"""
+    campaign = campaign_dialer.get(campaign_id)
+    if campaign is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    async def events():
+        async for progress in campaign.watch():
+            yield f"data: {json.dumps(progress)}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.post("/campaigns/{campaign_id}/cancel")
+async def cancel_campaign(campaign_id: str):
+    if campaign_dialer.get(campaign_id) is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    cancelled = await campaign_dialer.cancel(campaign_id)
+    return {"success": cancelled, "campaign": campaign_dialer.get(campaign_id).progress()}
+
 @app.get("/")
 async def root():
     return {
@@ -72,7 +163,11 @@ async def root():
         "endpoints": {
             "health": "/health",
             "make_call": "/make-call",
-            "end_call": "/end-call/{room_name}"
+            "end_call": "/end-call/{room_name}",
+            "calls": "/calls",
+            "end_call_by_id": "/calls/{call_id}/end",
+            "campaigns": "/campaigns",
+            "campaign_events": "/campaigns/{campaign_id}/events"
         }
     }
 
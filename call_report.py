@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Call Quality Report
+
+Fleet-level numbers for a set of Twilio calls exported by get_call_logs.py
+(JSONL or CSV), or fetched for a time range with the same exporter. Reports
+duration, queue time and post-dial delay percentiles, answer rates (overall
+and across hours), per-status and per-trunk breakdowns and cost totals.
+Post-dial delay is only available in exports made with --insights.
+
+Usage:
+    python call_report.py --file calls.jsonl
+    python call_report.py --file calls.csv --direction outbound-api --json
+    python call_report.py --since 2025-01-01 --until 2025-01-08 --insights
+"""
+
+import argparse
+import csv
+import json
+import numpy as np
+
+PERCENTILES = [50, 90, 95, 99]
+COLUMNS = ["status", "duration", "queue_time", "pdd_ms", "price", "price_unit", "trunk_sid", "start_time", "direction"]
+NUMERIC = ["duration", "queue_time", "pdd_ms", "price"]
+# Rows (metric, unit) of the percentile table; durations only count answered calls
+METRICS = [("duration", "s"), ("queue_time", "ms"), ("post_dial_delay", "ms")]
+
+def load_calls(path: str) -> dict:
+    """Read an export into one array per column; missing numbers become NaN"""
+    values = {column: [] for column in COLUMNS}
+    with open(path, newline='') as f:
+        if path.endswith('.csv'):
+            reader = csv.reader(f)
+            header = next(reader, [])
+            index = [header.index(column) if column in header else None for column in COLUMNS]
+            for row in reader:
+                for column, i in zip(COLUMNS, index):
+                    values[column].append(row[i] if i is not None else '')
+        else:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                for column in COLUMNS:
+                    values[column].append(record.get(column))
+
+    columns = {}
+    for column, raw in values.items():
+        if column in NUMERIC:
+            columns[column] = np.array([_to_float(value) for value in raw], dtype=float)
+        else:
+            columns[column] = np.array(['' if value is None else str(value) for value in raw])
+    return columns
+
+def _to_float(value) -> float:
+    if value is None or value == '':
+        return np.nan
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+def select(columns: dict, mask: np.ndarray) -> dict:
+    return {column: values[mask] for column, values in columns.items()}
+
+def percentiles(values: np.ndarray) -> dict:
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return {"n": 0}
+    return {"n": int(values.size), **{f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}}
+
+def cost_totals(columns: dict) -> dict:
+    """Total spend per currency; Twilio reports charges as negative prices"""
+    prices, units = columns["price"], columns["price_unit"]
+    priced = ~np.isnan(prices)
+    totals = {}
+    for unit in np.unique(units[priced]):
+        totals[unit or "unknown"] = round(float(-prices[priced & (units == unit)].sum()), 4)
+    return {"totals": totals, "unpriced_calls": int((~priced).sum())}
+
+def group_summary(columns: dict, answered: np.ndarray) -> dict:
+    return {
+        "calls": int(answered.size),
+        "answer_rate": float(answered.mean()) if answered.size else 0.0,
+        "duration": percentiles(columns["duration"][answered]),
+        "queue_time": percentiles(columns["queue_time"]),
+        "post_dial_delay": percentiles(columns["pdd_ms"]),
+        "cost": cost_totals(columns)
+    }
+
+def breakdown(columns: dict, answered: np.ndarray, key: str) -> dict:
+    """group_summary per distinct value of a column, largest groups first"""
+    groups, inverse, counts = np.unique(columns[key], return_inverse=True, return_counts=True)
+    report = {}
+    for g in np.argsort(-counts):
+        mask = inverse == g
+        report[groups[g] or "none"] = group_summary(select(columns, mask), answered[mask])
+    return report
+
+def hourly_answer_rates(columns: dict, answered: np.ndarray, min_calls: int) -> np.ndarray:
+    """Answer rate of every hour with at least min_calls calls"""
+    # Truncating "YYYY-MM-DD HH:MM:SS..." to 13 characters buckets start times by hour
+    hours = columns["start_time"].astype('U13')
+    has_hour = np.char.str_len(hours) == 13
+    _, inverse = np.unique(hours[has_hour], return_inverse=True)
+    calls = np.bincount(inverse)
+    answers = np.bincount(inverse, weights=answered[has_hour])
+    return (answers / calls)[calls >= min_calls]
+
+def build_report(columns: dict, min_calls: int = 20) -> dict:
+    answered = columns["status"] == "completed"
+    report = group_summary(columns, answered)
+    rates = hourly_answer_rates(columns, answered, min_calls)
+    report["hourly_answer_rate"] = percentiles(rates)
+    report["by_status"] = {
+        status: {"calls": summary["calls"], "duration": summary["duration"], "cost": summary["cost"]}
+        for status, summary in breakdown(columns, np.ones_like(answered), "status").items()
+    }
+    report["by_trunk"] = breakdown(columns, answered, "trunk_sid")
+    return report
+
+def _percentile_cells(stats: dict) -> str:
+    return "".join(f"{stats.get(f'p{p}', float('nan')):>10.1f}" for p in PERCENTILES)
+
+def print_report(report: dict):
+    print("\n" + "="*80)
+    print(f"CALL QUALITY REPORT - {report['calls']} calls, answer rate {report['answer_rate']:.1%}")
+    print("="*80)
+
+    header = f"{'metric':<28}{'n':>7}" + "".join(f"{'p' + str(p):>10}" for p in PERCENTILES)
+    print("\n" + header)
+    print("-" * len(header))
+    for name, unit in METRICS:
+        stats = report[name]
+        print(f"{f'{name} ({unit})':<28}{stats['n']:>7}" + (_percentile_cells(stats) if stats['n'] else ""))
+    rates = report["hourly_answer_rate"]
+    print(f"{'answer rate by hour (%)':<28}{rates['n']:>7}" + (_percentile_cells({k: v * 100 for k, v in rates.items() if k != 'n'}) if rates['n'] else ""))
+
+    cost = report["cost"]
+    print("\nCost: " + (", ".join(f"{total:.2f} {unit}" for unit, total in cost["totals"].items()) or "none")
+          + (f" ({cost['unpriced_calls']} calls not yet priced)" if cost["unpriced_calls"] else ""))
+
+    print(f"\n{'status':<16}{'calls':>8}{'share':>8}{'dur p50':>10}{'cost':>12}")
+    for status, summary in report["by_status"].items():
+        cost = sum(summary["cost"]["totals"].values())
+        print(f"{status:<16}{summary['calls']:>8}{summary['calls'] / report['calls']:>8.1%}"
+              f"{summary['duration'].get('p50', float('nan')):>10.1f}{cost:>12.2f}")
+
+    print(f"\n{'trunk':<36}{'calls':>8}{'answer':>8}{'dur p50':>10}{'pdd p50':>10}{'pdd p90':>10}{'queue p90':>10}{'cost':>12}")
+    for trunk, summary in report["by_trunk"].items():
+        cost = sum(summary["cost"]["totals"].values())
+        print(f"{trunk:<36}{summary['calls']:>8}{summary['answer_rate']:>8.1%}"
+              f"{summary['duration'].get('p50', float('nan')):>10.1f}"
+              f"{summary['post_dial_delay'].get('p50', float('nan')):>10.0f}"
+              f"{summary['post_dial_delay'].get('p90', float('nan')):>10.0f}"
+              f"{summary['queue_time'].get('p90', float('nan')):>10.0f}{cost:>12.2f}")
+
+def fetch_calls(args) -> str:
+    """Export the --since/--until range with the call log exporter and return the file"""
+    # Only needed when fetching; reading an existing export needs no Twilio client
+    from get_call_logs import CallExporter, TwilioCallAnalyzer
+
+    analyzer = TwilioCallAnalyzer(workers=args.workers)
+    CallExporter(analyzer, args.file, 'csv' if args.file.endswith('.csv') else 'jsonl', insights=args.insights).run(args.since, args.until)
+    return args.file
+
+def main():
+    parser = argparse.ArgumentParser(description='Fleet-level call quality report over exported Twilio calls')
+    parser.add_argument('--file', default='cache/calls.jsonl', help='Exported calls (JSONL or CSV); with --since the export is written here')
+    parser.add_argument('--since', help='Fetch calls started at or after this ISO date/time (UTC) before reporting')
+    parser.add_argument('--until', help='End of the fetched range (default: now)')
+    parser.add_argument('--insights', action='store_true', help='Fetch post-dial delay from Voice Insights (one request per call)')
+    parser.add_argument('--workers', type=int, default=8, help='Parallel Voice Insights fetches')
+    parser.add_argument('--direction', nargs='+', help='Only include these directions (e.g. outbound-api inbound)')
+    parser.add_argument('--trunk', nargs='+', help='Only include calls on these trunk SIDs')
+    parser.add_argument('--min-calls', type=int, default=20, help='Minimum calls for an hour to count in the hourly answer rate')
+    parser.add_argument('--json', action='store_true', help='Output as JSON')
+
+    args = parser.parse_args()
+
+    if args.since:
+        from get_call_logs import parse_time
+        args.since = parse_time(args.since)
+        args.until = parse_time(args.until) if args.until else None
+        fetch_calls(args)
+
+    try:
+        columns = load_calls(args.file)
+    except FileNotFoundError:
+        print(f"No call export at {args.file}")
+        return 1
+
+    mask = np.ones(columns["status"].size, dtype=bool)
+    if args.direction:
+        mask &= np.isin(columns["direction"], args.direction)
+    if args.trunk:
+        mask &= np.isin(columns["trunk_sid"], args.trunk)
+    columns = select(columns, mask)
+    if columns["status"].size == 0:
+        print(f"No matching calls in {args.file}")
+        return 1
+
+    report = build_report(columns, args.min_calls)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -10,14 +10,29 @@ This script retrieves comprehensive information about a Twilio call including:
 - Conference details if applicable
 - All available metadata
 
+Sub-resources are fetched concurrently and cached on disk per call SID and
+resource (cache/twilio by default). Entries for finished calls never expire;
+entries for calls still in progress expire after --cache-ttl seconds.
+
+--since/--until exports the call list for a time range to JSONL or CSV page by
+page; an interrupted export resumes from <output>.checkpoint when rerun.
+
 Usage:
     python get_call_logs.py --call-sid CAxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
     python get_call_logs.py --call-sid CAxxxxxxxxxxxxxxxxxxxxxxxxxxxxx --detailed
+    python get_call_logs.py --call-sids-file sids.txt --workers 16 --output analyses.jsonl
+    python get_call_logs.py --since 2025-01-01 --until 2025-01-08 --output calls.csv --insights
 """
 
 import argparse
+import csv
 import json
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Dict, Iterable, Iterator, Optional
 from twilio.rest import Client
 from dotenv import load_dotenv
 import os
@@ -30,8 +45,91 @@ load_dotenv('.env.test')
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Calls in these states never change again, so everything fetched for them can be cached forever
+FINAL_CALL_STATUSES = {"completed", "busy", "failed", "no-answer", "canceled"}
+
+# Columns of an exported call record, in CSV order
+EXPORT_FIELDS = [
+    "sid", "account_sid", "from", "to", "status", "start_time", "end_time", "duration", "price",
+    "price_unit", "direction", "answered_by", "caller_name", "uri", "parent_call_sid",
+    "phone_number_sid", "forwarded_from", "group_sid", "queue_time", "trunk_sid"
+]
+INSIGHTS_FIELDS = ["pdd_ms", "disconnected_by", "last_sip_response_num"]
+
+def flatten_call(call) -> dict:
+    """Call resource as a flat, JSON-serializable record"""
+    return {
+        "sid": call.sid,
+        "account_sid": call.account_sid,
+        "from": call.from_formatted,
+        "to": call.to_formatted,
+        "status": call.status,
+        "start_time": str(call.start_time) if call.start_time else None,
+        "end_time": str(call.end_time) if call.end_time else None,
+        "duration": call.duration,
+        "price": call.price,
+        "price_unit": call.price_unit,
+        "direction": call.direction,
+        "answered_by": call.answered_by,
+        "caller_name": call.caller_name,
+        "uri": call.uri,
+        "parent_call_sid": call.parent_call_sid,
+        "phone_number_sid": call.phone_number_sid,
+        "forwarded_from": call.forwarded_from,
+        "group_sid": call.group_sid,
+        "queue_time": call.queue_time,
+        "trunk_sid": call.trunk_sid
+    }
+
+class ResponseCache:
+    """On-disk cache of fetched call resources, one JSON file per call SID and resource"""
+
+    def __init__(self, directory: str, ttl: float = 60):
+        self.directory = directory
+        self.ttl = ttl
+        self._final: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, call_sid: str, resource: str) -> str:
+        return os.path.join(self.directory, call_sid, f"{resource}.json")
+
+    def get(self, call_sid: str, resource: str):
+        try:
+            with open(self._path(call_sid, resource)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if resource == "details":
+            self._final[call_sid] = entry["final"]
+        if entry["final"] or time.time() - entry["fetched_at"] < self.ttl:
+            return entry["data"]
+        return None
+
+    def put(self, call_sid: str, resource: str, data, final: bool = True):
+        """Store data and return it; final entries only if the call itself has finished"""
+        with self._lock:
+            if resource == "details":
+                self._final[call_sid] = final
+            else:
+                final = final and self._final.get(call_sid, False)
+        path = self._path(call_sid, resource)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial file
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({"fetched_at": time.time(), "final": final, "data": data}, f, default=str)
+        os.replace(tmp, path)
+        return data
+
+class NullCache:
+    def get(self, call_sid: str, resource: str):
+        return None
+
+    def put(self, call_sid: str, resource: str, data, final: bool = True):
+        return data
+
 class TwilioCallAnalyzer:
-    def __init__(self):
+    def __init__(self, workers: int = 8, cache_dir: Optional[str] = None, cache_ttl: float = 60):
         self.account_sid = os.getenv('TWILIO_ACCOUNT_SID')
         self.auth_token = os.getenv('TWILIO_AUTH_TOKEN')
         
@@ -39,40 +137,32 @@ class TwilioCallAnalyzer:
             raise ValueError("Missing Twilio credentials in .env.test")
         
         self.client = Client(self.account_sid, self.auth_token)
+        self.workers = workers
+        self.cache = ResponseCache(cache_dir, cache_ttl) if cache_dir else NullCache()
+        # Sub-resource fetches get their own pool so bulk analysis can never starve them
+        self.pool = ThreadPoolExecutor(max_workers=workers * 4, thread_name_prefix="twilio-fetch")
 
     def get_call_details(self, call_sid: str) -> dict:
         """Get basic call details"""
+        cached = self.cache.get(call_sid, "details")
+        if cached is not None:
+            return cached
+        
         try:
             call = self.client.calls(call_sid).fetch()
             
-            return {
-                "sid": call.sid,
-                "account_sid": call.account_sid,
-                "from": call.from_formatted,
-                "to": call.to_formatted,
-                "status": call.status,
-                "start_time": str(call.start_time) if call.start_time else None,
-                "end_time": str(call.end_time) if call.end_time else None,
-                "duration": call.duration,
-                "price": call.price,
-                "price_unit": call.price_unit,
-                "direction": call.direction,
-                "answered_by": call.answered_by,
-                "caller_name": call.caller_name,
-                "uri": call.uri,
-                "parent_call_sid": call.parent_call_sid,
-                "phone_number_sid": call.phone_number_sid,
-                "forwarded_from": call.forwarded_from,
-                "group_sid": call.group_sid,
-                "queue_time": call.queue_time,
-                "trunk_sid": call.trunk_sid
-            }
+            details = flatten_call(call)
+            return self.cache.put(call_sid, "details", details, final=call.status in FINAL_CALL_STATUSES)
         except Exception as e:
             logger.error(f"Error fetching call details: {e}")
             return None
 
     def get_call_events(self, call_sid: str) -> list:
         """Get call events/timeline"""
+        cached = self.cache.get(call_sid, "events")
+        if cached is not None:
+            return cached
+        
         try:
             events = self.client.calls(call_sid).events.list()
             
@@ -84,13 +174,17 @@ class TwilioCallAnalyzer:
                     "data": event.data
                 })
             
-            return sorted(event_list, key=lambda x: x["timestamp"])
+            return self.cache.put(call_sid, "events", sorted(event_list, key=lambda x: x["timestamp"]))
         except Exception as e:
             logger.error(f"Error fetching call events: {e}")
             return []
 
     def get_call_recordings(self, call_sid: str) -> list:
         """Get call recordings"""
+        cached = self.cache.get(call_sid, "recordings")
+        if cached is not None:
+            return cached
+        
         try:
             recordings = self.client.recordings.list(call_sid=call_sid)
             
@@ -111,13 +205,19 @@ class TwilioCallAnalyzer:
                     "date_updated": str(recording.date_updated)
                 })
             
-            return recording_list
+            # A recording still processing can change; only cache the list for good once all are done
+            final = all(recording["status"] == "completed" for recording in recording_list)
+            return self.cache.put(call_sid, "recordings", recording_list, final=final)
         except Exception as e:
             logger.error(f"Error fetching recordings: {e}")
             return []
 
     def get_call_notifications(self, call_sid: str) -> list:
         """Get call notifications/alerts"""
+        cached = self.cache.get(call_sid, "notifications")
+        if cached is not None:
+            return cached
+        
         try:
             notifications = self.client.calls(call_sid).notifications.list()
             
@@ -139,24 +239,28 @@ class TwilioCallAnalyzer:
                     "response_body": notification.response_body
                 })
             
-            return notification_list
+            return self.cache.put(call_sid, "notifications", notification_list)
         except Exception as e:
             logger.error(f"Error fetching notifications: {e}")
             return []
 
     def get_call_feedback(self, call_sid: str) -> dict:
         """Get call quality feedback if available"""
+        cached = self.cache.get(call_sid, "feedback")
+        if cached is not None:
+            return cached
+        
         try:
             feedback = self.client.calls(call_sid).feedback.fetch()
             
-            return {
+            return self.cache.put(call_sid, "feedback", {
                 "account_sid": feedback.account_sid,
                 "call_sid": feedback.call_sid,
                 "quality_score": feedback.quality_score,
                 "issues": feedback.issues,
                 "date_created": str(feedback.date_created),
                 "date_updated": str(feedback.date_updated)
-            }
+            })
         except Exception as e:
             # Feedback might not exist for all calls
             logger.debug(f"No feedback found for call: {e}")
@@ -164,10 +268,14 @@ class TwilioCallAnalyzer:
 
     def get_call_summary(self, call_sid: str) -> dict:
         """Get call summary with metrics"""
+        cached = self.cache.get(call_sid, "summary")
+        if cached is not None:
+            return cached
+        
         try:
             summary = self.client.calls(call_sid).summary().fetch()
             
-            return {
+            data = {
                 "account_sid": summary.account_sid,
                 "call_sid": summary.call_sid,
                 "call_type": summary.call_type,
@@ -180,23 +288,26 @@ class TwilioCallAnalyzer:
                 "processing_state": summary.processing_state,
                 "created_time": str(summary.created_time),
                 "start_time": str(summary.start_time),
-                "end_time": str(summary.end_time)
+                "end_time": str(summary.end_time),
+                "properties": summary.properties
             }
+            # Voice Insights keeps refining a summary until processing is complete
+            return self.cache.put(call_sid, "summary", data, final=summary.processing_state == "complete")
         except Exception as e:
             logger.debug(f"No summary found for call: {e}")
             return None
 
-    def get_sip_logs(self, call_sid: str) -> list:
+    def get_sip_logs(self, call_sid: str, details: Optional[dict] = None) -> list:
         """Get SIP logs for trunk calls"""
         try:
             # Try to get SIP interface logs
             sip_logs = []
             
             # Get the call details first to check if it's a SIP trunk call
-            call = self.client.calls(call_sid).fetch()
+            trunk_sid = (details or self.get_call_details(call_sid) or {}).get("trunk_sid")
             
-            if call.trunk_sid:
-                logger.info(f"Call used SIP trunk: {call.trunk_sid}")
+            if trunk_sid:
+                logger.info(f"Call used SIP trunk: {trunk_sid}")
                 # You can add more SIP-specific log retrieval here
                 # Twilio's SIP logs are usually available through the console
                 # but not always through the API
@@ -230,31 +341,37 @@ class TwilioCallAnalyzer:
             logger.error("Call not found or access denied")
             return analysis
         
-        # Get call events
-        logger.info("Fetching call events...")
-        analysis["events"] = self.get_call_events(call_sid)
-        
-        # Get recordings
-        logger.info("Fetching recordings...")
-        analysis["recordings"] = self.get_call_recordings(call_sid)
-        
-        # Get notifications/errors
-        logger.info("Fetching notifications...")
-        analysis["notifications"] = self.get_call_notifications(call_sid)
+        # The remaining resources are independent, so fetch them all at once
+        fetches = {
+            "events": self.pool.submit(self.get_call_events, call_sid),
+            "recordings": self.pool.submit(self.get_call_recordings, call_sid),
+            "notifications": self.pool.submit(self.get_call_notifications, call_sid)
+        }
         
         if detailed:
             # Get additional detailed information
-            logger.info("Fetching call feedback...")
-            analysis["feedback"] = self.get_call_feedback(call_sid)
-            
-            logger.info("Fetching call summary...")
-            analysis["summary"] = self.get_call_summary(call_sid)
-            
-            logger.info("Fetching SIP information...")
-            analysis["sip_info"] = self.get_sip_logs(call_sid)
+            fetches["feedback"] = self.pool.submit(self.get_call_feedback, call_sid)
+            fetches["summary"] = self.pool.submit(self.get_call_summary, call_sid)
+            fetches["sip_info"] = self.pool.submit(self.get_sip_logs, call_sid, analysis["call_details"])
+        
+        for resource, future in fetches.items():
+            analysis[resource] = future.result()
         
         return analysis
 
+    def analyze_calls(self, call_sids: Iterable[str], detailed: bool = False) -> Iterator[dict]:
+        """Analyze many calls in parallel, yielding each analysis as soon as it is done"""
+        # Only a window of calls is submitted at a time, so memory stays flat for any number of SIDs
+        window = self.workers * 2
+        call_sids = iter(call_sids)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="twilio-call") as calls:
+            pending = {calls.submit(self.analyze_call, call_sid, detailed) for call_sid in islice(call_sids, window)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+                pending |= {calls.submit(self.analyze_call, call_sid, detailed) for call_sid in islice(call_sids, len(done))}
+
     def print_analysis(self, analysis: dict):
         """Print formatted analysis"""
         print("\n" + "="*80)
@@ -327,22 +444,158 @@ class TwilioCallAnalyzer:
             if feedback['issues']:
                 print(f"   Issues: {feedback['issues']}")
 
+class CallExporter:
+    """Streams the call list for a time range to JSONL or CSV one page at a time, with a resumable checkpoint"""
+
+    def __init__(self, analyzer: TwilioCallAnalyzer, output: str, fmt: str, insights: bool = False):
+        self.analyzer = analyzer
+        self.output = output
+        self.fmt = fmt
+        self.insights = insights
+        self.fields = EXPORT_FIELDS + (INSIGHTS_FIELDS if insights else [])
+        self.checkpoint_path = f"{output}.checkpoint"
+
+    def _load_checkpoint(self, since: datetime, until: Optional[datetime]) -> Optional[dict]:
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Without an explicit --until, a resumed export keeps the end of the original run
+        expected_until = until.isoformat() if until else checkpoint["until"]
+        if (checkpoint["since"], checkpoint["until"], checkpoint["format"]) != (since.isoformat(), expected_until, self.fmt):
+            raise ValueError(f"{self.checkpoint_path} belongs to a different export; delete it or pick another --output")
+        return checkpoint
+
+    def _save_checkpoint(self, since: datetime, until: datetime, next_page_url: str, written: int, offset: int):
+        checkpoint = {
+            "since": since.isoformat(),
+            "until": until.isoformat(),
+            "format": self.fmt,
+            "next_page_url": next_page_url,
+            "written": written,
+            "offset": offset
+        }
+        tmp = f"{self.checkpoint_path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    def _add_insights(self, record: dict) -> dict:
+        # Seed the cache with the listed details so the summary can be cached as final
+        self.analyzer.cache.put(record["sid"], "details", record, final=record["status"] in FINAL_CALL_STATUSES)
+        summary = self.analyzer.get_call_summary(record["sid"]) or {}
+        properties = summary.get("properties") or {}
+        for field in INSIGHTS_FIELDS:
+            record[field] = properties.get(field)
+        return record
+
+    def run(self, since: datetime, until: Optional[datetime] = None, page_size: int = 1000) -> int:
+        """Export every call started in [since, until), until defaulting to now; returns the number of calls written"""
+        checkpoint = self._load_checkpoint(since, until)
+        calls = self.analyzer.client.calls
+        if checkpoint:
+            until = datetime.fromisoformat(checkpoint["until"])
+            # Drop anything written after the last checkpoint; that page is fetched again
+            f = open(self.output, 'a+', newline='')
+            f.truncate(checkpoint["offset"])
+            written = checkpoint["written"]
+            page = calls.get_page(checkpoint["next_page_url"])
+            logger.info(f"Resuming export of {self.output} after {written} calls")
+        else:
+            until = until or datetime.now(timezone.utc)
+            if since >= until:
+                raise ValueError("--since must be before --until")
+            f = open(self.output, 'w', newline='')
+            written = 0
+            page = calls.page(start_time_after=since, start_time_before=until, page_size=page_size)
+        
+        with f:
+            writer = csv.DictWriter(f, fieldnames=self.fields, extrasaction='ignore') if self.fmt == 'csv' else None
+            if writer and not checkpoint:
+                writer.writeheader()
+            
+            # Only one page of records is ever held in memory
+            while page is not None:
+                records = [flatten_call(call) for call in page]
+                if self.insights:
+                    records = list(self.analyzer.pool.map(self._add_insights, records))
+                for record in records:
+                    if writer:
+                        writer.writerow(record)
+                    else:
+                        f.write(json.dumps(record, default=str) + "\n")
+                written += len(records)
+                f.flush()
+                
+                next_page_url = page.next_page_url
+                if not next_page_url:
+                    break
+                self._save_checkpoint(since, until, next_page_url, written, f.tell())
+                logger.info(f"Exported {written} calls")
+                page = calls.get_page(next_page_url)
+        
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        return written
+
+def parse_time(value: str) -> datetime:
+    """ISO date or datetime; naive values are taken as UTC"""
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def is_valid_call_sid(call_sid: str) -> bool:
+    return call_sid.startswith('CA') and len(call_sid) == 34
+
+def read_call_sids(path: str) -> list:
+    """One Call SID per line; blank lines and # comments are ignored"""
+    with open(path) as f:
+        lines = (line.split('#', 1)[0].strip() for line in f)
+        return list(dict.fromkeys(line for line in lines if line))
+
 def main():
     parser = argparse.ArgumentParser(description='Analyze Twilio call logs')
-    parser.add_argument('--call-sid', required=True, help='Twilio Call SID (e.g., CAxxxxxxxxxxxxxxxxxxxxxxxxxxxxx)')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--call-sid', help='Twilio Call SID (e.g., CAxxxxxxxxxxxxxxxxxxxxxxxxxxxxx)')
+    target.add_argument('--call-sids-file', help='File with one Call SID per line, analyzed in parallel')
+    target.add_argument('--since', type=parse_time, help='Export calls started at or after this ISO date/time (UTC)')
+    parser.add_argument('--until', type=parse_time, help='Export calls started before this ISO date/time (default: now)')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help='Export format (default: from --output extension)')
+    parser.add_argument('--page-size', type=int, default=1000, help='Calls per page when exporting')
+    parser.add_argument('--insights', action='store_true', help='Add post-dial delay and hangup details from Voice Insights to exports')
     parser.add_argument('--detailed', action='store_true', help='Include detailed analysis (feedback, summary)')
     parser.add_argument('--json', action='store_true', help='Output as JSON')
-    parser.add_argument('--output', help='Save to file')
+    parser.add_argument('--output', help='Save to file (JSON lines with --call-sids-file)')
+    parser.add_argument('--workers', type=int, default=8, help='Calls analyzed in parallel in bulk mode')
+    parser.add_argument('--cache-dir', default=os.getenv('TWILIO_CACHE_DIR', 'cache/twilio'), help='On-disk response cache')
+    parser.add_argument('--cache-ttl', type=float, default=60, help='Seconds to reuse cached data of calls still in progress')
+    parser.add_argument('--no-cache', action='store_true', help='Always fetch from Twilio')
     
     args = parser.parse_args()
     
+    if args.since:
+        if not args.output:
+            parser.error('--since requires --output')
+        return export(args)
+    
+    call_sids = read_call_sids(args.call_sids_file) if args.call_sids_file else [args.call_sid]
+    
     # Validate Call SID format
-    if not args.call_sid.startswith('CA') or len(args.call_sid) != 34:
-        logger.error("Invalid Call SID format. Should be CAxxxxxxxxxxxxxxxxxxxxxxxxxxxxx")
+    invalid = [call_sid for call_sid in call_sids if not is_valid_call_sid(call_sid)]
+    if invalid:
+        logger.error(f"Invalid Call SID format: {', '.join(invalid[:5])}. Should be CAxxxxxxxxxxxxxxxxxxxxxxxxxxxxx")
         return 1
     
     try:
-        analyzer = TwilioCallAnalyzer()
+        analyzer = TwilioCallAnalyzer(
+            workers=args.workers,
+            cache_dir=None if args.no_cache else args.cache_dir,
+            cache_ttl=args.cache_ttl
+        )
+        
+        if args.call_sids_file:
+            return analyze_bulk(analyzer, call_sids, args)
+        
         analysis = analyzer.analyze_call(args.call_sid, args.detailed)
         
         if args.json:
@@ -366,5 +619,52 @@ def main():
         logger.error(f"Analysis failed: {e}")
         return 1
 
+def export(args) -> int:
+    """Stream every call in the --since/--until range to --output"""
+    fmt = args.format or ('csv' if args.output.endswith('.csv') else 'jsonl')
+    started = time.monotonic()
+    
+    try:
+        analyzer = TwilioCallAnalyzer(
+            workers=args.workers,
+            cache_dir=None if args.no_cache else args.cache_dir,
+            cache_ttl=args.cache_ttl
+        )
+        exporter = CallExporter(analyzer, args.output, fmt, insights=args.insights)
+        written = exporter.run(args.since, args.until, page_size=args.page_size)
+    except ValueError as e:
+        logger.error(f"Configuration error: {e}")
+        return 1
+    except Exception as e:
+        logger.error(f"Export failed, rerun the same command to resume: {e}")
+        return 1
+    
+    logger.info(f"Exported {written} calls to {args.output} in {time.monotonic() - started:.1f}s")
+    return 0
+
+def analyze_bulk(analyzer: TwilioCallAnalyzer, call_sids: list, args) -> int:
+    """Analyze every SID in parallel, writing each analysis as soon as it is done"""
+    started = time.monotonic()
+    not_found = 0
+    output = open(args.output, 'w') if args.output else None
+    try:
+        for analysis in analyzer.analyze_calls(call_sids, args.detailed):
+            if not analysis["call_details"]:
+                not_found += 1
+            if args.json:
+                print(json.dumps(analysis, default=str))
+            elif not output:
+                analyzer.print_analysis(analysis)
+            if output:
+                output.write(json.dumps(analysis, default=str) + "\n")
+    finally:
+        if output:
+            output.close()
+    
+    logger.info(f"Analyzed {len(call_sids)} calls in {time.monotonic() - started:.1f}s ({not_found} not found)")
+    if output:
+        logger.info(f"Analyses saved to {args.output}")
+    return 0
+
 if __name__ == "__main__":
     exit(main())
\ No newline at end of file
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Conversation Keyword Matcher Benchmark
+
+Compares the compiled single-pass keyword matcher used by ConversationManager
+with the previous approach (one lowercase substring scan per keyword list) on
+realistic call transcripts, and shows where the two disagree.
+
+Usage:
+    python keyword_benchmark.py
+    python keyword_benchmark.py --iterations 20000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from agent.conversation import KEYWORD_MATCHER, PAIN_KEYWORDS, STATE_TRANSITIONS
+
+TRANSCRIPTS = [
+    "Hola, buenos días, sí, dígame.",
+    "Sí, la verdad tenemos un problema con la atención, los clientes esperan mucho.",
+    "Necesitamos un sistema que nos ayude, estamos saturados y no damos abasto.",
+    "Pues mira, todo lo hacemos manual y es bastante repetitivo, nos quedamos atrás de la competencia.",
+    "¿Cómo funciona eso? Suena interesante pero me preocupan los costos.",
+    "Perfecto, ¿cuándo podemos agendar la reunión?",
+    "Ahorita estoy ocupado, el presupuesto de este año ya está asignado.",
+    "No sé, nuestro sistema actual funciona más o menos bien, aunque la demora es notable.",
+    "Claro, es difícil mantener los procesos con tanta sobrecarga de trabajo.",
+    "Oye, ¿y eso en cuánto tiempo estaría listo? Necesitamos innovar rápido."
+]
+
+def legacy_match(text: str):
+    """The previous per-list substring scans, kept here only for comparison"""
+    user_lower = text.lower()
+    triggers = {
+        state for state, (_, words) in STATE_TRANSITIONS.items()
+        if any(word in user_lower for word in words)
+    }
+    pain_points = [
+        pain_type for pain_type, keywords in PAIN_KEYWORDS.items()
+        if any(keyword in text.lower() for keyword in keywords)
+    ]
+    return triggers, pain_points
+
+def compiled_match(text: str):
+    hits = KEYWORD_MATCHER.match(text)
+    triggers = {name for kind, name in hits if kind == "state"}
+    pain_points = [pain_type for pain_type in PAIN_KEYWORDS if ("pain", pain_type) in hits]
+    return triggers, pain_points
+
+def bench(fn, iterations: int) -> float:
+    """Mean microseconds per transcript"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for text in TRANSCRIPTS:
+            fn(text)
+    return (time.perf_counter() - started) / (iterations * len(TRANSCRIPTS)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the conversation keyword matcher')
+    parser.add_argument('--iterations', type=int, default=5000, help='Passes over the transcript set')
+
+    args = parser.parse_args()
+
+    legacy = bench(legacy_match, args.iterations)
+    compiled = bench(compiled_match, args.iterations)
+
+    print("\n" + "="*80)
+    print(f"KEYWORD MATCHING - {len(TRANSCRIPTS)} transcripts x {args.iterations} iterations")
+    print("="*80)
+    print(f"\n{'substring scans (before)':<28}{legacy:>10.2f} us/transcript")
+    print(f"{'compiled matcher':<28}{compiled:>10.2f} us/transcript")
+    print(f"{'speedup':<28}{legacy / compiled:>10.2f}x")
+
+    print("\nDifferences (word boundaries drop substring hits, accent folding adds \"sí\"/\"reunión\"):")
+    for text in TRANSCRIPTS:
+        before, after = legacy_match(text), compiled_match(text)
+        if before != after:
+            print(f"  {text}")
+            print(f"    before: states={sorted(before[0])} pains={before[1]}")
+            print(f"    after:  states={sorted(after[0])} pains={after[1]}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
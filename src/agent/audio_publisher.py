@@ -0,0 +1,106 @@
+from typing import AsyncIterator, Optional
+from livekit import rtc
+from loguru import logger
+
+from utils.config import config
+from utils.tracing import trace_mark
+
+class AudioPublisher:
+    """Publish TTS audio to the room as fixed-size frames while it is still being synthesized"""
+
+    def __init__(
+        self,
+        room: rtc.Room,
+        sample_rate: int = 24000,
+        num_channels: int = 1,
+        frame_ms: Optional[int] = None,
+        track_name: str = "laura-voice"
+    ):
+        self.room = room
+        self.track_name = track_name
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.frame_ms = frame_ms if frame_ms is not None else config.tts_frame_ms
+        self.samples_per_frame = sample_rate * self.frame_ms // 1000
+        self.frame_bytes = self.samples_per_frame * num_channels * 2
+
+        self.source: Optional[rtc.AudioSource] = None
+        self.track: Optional[rtc.LocalAudioTrack] = None
+        self.publication: Optional[rtc.LocalTrackPublication] = None
+        self._remainder = bytearray()
+
+    async def start(self):
+        """Create the audio source and publish it as the agent's microphone track"""
+        if self.source is not None:
+            return
+        self.source = rtc.AudioSource(self.sample_rate, self.num_channels)
+        self.track = rtc.LocalAudioTrack.create_audio_track(self.track_name, self.source)
+        options = rtc.TrackPublishOptions(source=rtc.TrackSource.SOURCE_MICROPHONE)
+        self.publication = await self.room.local_participant.publish_track(self.track, options)
+        logger.info(f"Published agent audio track {self.track_name} ({self.sample_rate} Hz, {self.frame_ms} ms frames)")
+
+    async def push(self, chunk: bytes) -> int:
+        """Cut incoming PCM into whole frames and capture them, keeping any partial frame for later"""
+        self._remainder.extend(chunk)
+        frames = 0
+        while len(self._remainder) >= self.frame_bytes:
+            await self._capture(self._remainder[:self.frame_bytes])
+            del self._remainder[:self.frame_bytes]
+            frames += 1
+        return frames
+
+    async def flush(self) -> int:
+        """Pad and send the trailing partial frame at the end of an utterance"""
+        usable = len(self._remainder) - len(self._remainder) % (2 * self.num_channels)
+        if usable <= 0:
+            self._remainder.clear()
+            return 0
+        frame = bytes(self._remainder[:usable]) + bytes(self.frame_bytes - usable)
+        self._remainder.clear()
+        await self._capture(frame)
+        return 1
+
+    async def publish_stream(self, chunks: AsyncIterator[bytes]) -> int:
+        """Publish a stream of TTS chunks; returns the number of frames sent"""
+        await self.start()
+        frames = 0
+        first_chunk = True
+        try:
+            async for chunk in chunks:
+                if first_chunk and chunk:
+                    logger.debug("First TTS chunk received, publishing")
+                    first_chunk = False
+                frames += await self.push(chunk)
+        except BaseException:
+            self._remainder.clear()
+            raise
+        frames += await self.flush()
+        return frames
+    
+    def clear(self):
+        """Drop pending and queued audio so the agent stops talking immediately"""
+        self._remainder.clear()
+        if self.source is not None:
+            self.source.clear_queue()
+
+    async def _capture(self, data: bytes):
+        frame = rtc.AudioFrame(
+            data=data,
+            sample_rate=self.sample_rate,
+            num_channels=self.num_channels,
+            samples_per_channel=self.samples_per_frame
+        )
+        await self.source.capture_frame(frame)
+        trace_mark("first_frame_published")
+
+    async def aclose(self):
+        self._remainder.clear()
+        if self.publication is not None:
+            try:
+                await self.room.local_participant.unpublish_track(self.publication.sid)
+            except Exception as e:
+                logger.debug(f"Could not unpublish {self.track_name}: {e}")
+            self.publication = None
+        if self.source is not None:
+            await self.source.aclose()
+            self.source = None
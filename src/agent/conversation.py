@@ -1,6 +1,35 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, Tuple
 from loguru import logger
-from ..utils.config import config
+from utils.config import config
+from utils.keyword_matcher import KeywordMatcher
+
+# State -> (next state, words that move the conversation forward)
+STATE_TRANSITIONS = {
+    "greeting": ("pain_identification", ["hola", "buenos", "si", "bien"]),
+    "pain_identification": ("solution_presentation", ["si", "claro", "exacto", "problema", "dificil"]),
+    "solution_presentation": ("meeting_scheduling", ["interesante", "si", "como", "reunion", "platica"]),
+    "meeting_scheduling": ("closing", ["si", "cuando", "agenda", "agendar", "agendemos", "reunion", "perfecto"])
+}
+
+# Whole-word keywords; plurals match automatically, gender and verb forms are listed
+PAIN_KEYWORDS = {
+    "atencion_lenta": [
+        "lento", "lenta", "tarda", "tardan", "tardamos", "tardando",
+        "demora", "demoran", "demoramos", "demorando", "espera", "esperan", "esperando", "esperar", "atencion"
+    ],
+    "sobrecarga": [
+        "mucho trabajo", "sobrecarga", "sobrecargado", "sobrecargada", "saturado", "saturada", "no damos abasto"
+    ],
+    "innovacion": ["innovar", "innovando", "competencia", "quedamos atras", "quedando atras", "tecnologia"],
+    "procesos": ["manual", "manualmente", "repetitivo", "repetitiva", "ineficiente", "proceso"],
+    "costos": ["caro", "costo", "gasto", "presupuesto"]
+}
+
+# Every table compiled once into a single matcher shared by all conversations
+KEYWORD_MATCHER = KeywordMatcher({
+    **{("state", state): words for state, (_, words) in STATE_TRANSITIONS.items()},
+    **{("pain", pain_type): words for pain_type, words in PAIN_KEYWORDS.items()}
+})
 
 class ConversationManager:
     def __init__(self):
@@ -12,44 +41,51 @@ class ConversationManager:
     def get_current_system_prompt(self) -> str:
         return config.system_prompt
     
+    def analyze(self, user_input: str) -> Tuple[Set[str], List[str]]:
+        """One pass over the transcript: states whose trigger words occur, and pain points mentioned"""
+        hits = KEYWORD_MATCHER.match(user_input)
+        triggers = {name for kind, name in hits if kind == "state"}
+        pain_points = [pain_type for pain_type in PAIN_KEYWORDS if ("pain", pain_type) in hits]
+        return triggers, pain_points
+    
+    def process_turn(self, user_input: str, assistant_response: str):
+        """Update state and pain points from a single keyword pass"""
+        triggers, pain_points = self.analyze(user_input)
+        self._advance(triggers)
+        self._record_pain_points(pain_points)
+    
     def update_conversation_state(self, user_input: str, assistant_response: str):
-        user_lower = user_input.lower()
-        
-        if self.conversation_state == "greeting":
-            if any(word in user_lower for word in ["hola", "buenos", "si", "bien"]):
-                self.conversation_state = "pain_identification"
-                logger.info("Conversation state: greeting -> pain_identification")
-        
-        elif self.conversation_state == "pain_identification":
-            if any(word in user_lower for word in ["si", "claro", "exacto", "problema", "dificil"]):
-                self.conversation_state = "solution_presentation"
-                logger.info("Conversation state: pain_identification -> solution_presentation")
-        
-        elif self.conversation_state == "solution_presentation":
-            if any(word in user_lower for word in ["interesante", "si", "como", "reunion", "platica"]):
-                self.conversation_state = "meeting_scheduling"
-                logger.info("Conversation state: solution_presentation -> meeting_scheduling")
-        
-        elif self.conversation_state == "meeting_scheduling":
-            if any(word in user_lower for word in ["si", "cuando", "agenda", "reunion", "perfecto"]):
-                self.meeting_scheduled = True
-                self.conversation_state = "closing"
-                logger.info("Conversation state: meeting_scheduling -> closing (MEETING SCHEDULED!)")
+        triggers, _ = self.analyze(user_input)
+        self._advance(triggers)
+    
+    def _advance(self, triggers: Set[str]):
+        if self.conversation_state not in triggers:
+            return
+        next_state = STATE_TRANSITIONS[self.conversation_state][0]
+        if next_state == "closing":
+            self.meeting_scheduled = True
+            logger.info(f"Conversation state: {self.conversation_state} -> closing (MEETING SCHEDULED!)")
+        else:
+            logger.info(f"Conversation state: {self.conversation_state} -> {next_state}")
+        self.conversation_state = next_state
+    
+    def transition(self, state: str, meeting_scheduled: bool = False):
+        """Move to a state decided outside the keyword rules (e.g. by the intent router)"""
+        if meeting_scheduled:
+            self.meeting_scheduled = True
+        if state != self.conversation_state:
+            logger.info(f"Conversation state: {self.conversation_state} -> {state}")
+            self.conversation_state = state
     
     def extract_pain_points(self, user_input: str):
-        pain_keywords = {
-            "atencion_lenta": ["lento", "tardamos", "demora", "espera", "atencion"],
-            "sobrecarga": ["mucho trabajo", "sobrecarga", "saturados", "no damos abasto"],
-            "innovacion": ["innovar", "competencia", "quedamos atras", "tecnologia"],
-            "procesos": ["manual", "repetitivo", "ineficiente", "procesos"],
-            "costos": ["caro", "costos", "gastos", "presupuesto"]
-        }
-        
-        for pain_type, keywords in pain_keywords.items():
-            if any(keyword in user_input.lower() for keyword in keywords):
-                if pain_type not in self.identified_pain_points:
-                    self.identified_pain_points.append(pain_type)
-                    logger.info(f"Identified pain point: {pain_type}")
+        _, pain_points = self.analyze(user_input)
+        self._record_pain_points(pain_points)
+    
+    def _record_pain_points(self, pain_points: List[str]):
+        for pain_type in pain_points:
+            if pain_type not in self.identified_pain_points:
+                self.identified_pain_points.append(pain_type)
+                logger.info(f"Identified pain point: {pain_type}")
     
     def get_conversation_summary(self) -> Dict:
         return {
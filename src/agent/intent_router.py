@@ -0,0 +1,115 @@
+import json
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from loguru import logger
+
+from utils.config import config
+from utils.text_normalize import normalize_words
+
+# Words that carry no intent and would otherwise dilute the match confidence
+FILLER_WORDS = {"eh", "em", "mm", "este", "pues", "mira", "oye", "bueno", "ah", "ay", "laura"}
+
+@dataclass
+class Intent:
+    name: str
+    phrases: List[str]
+    reply: str
+    # Conversation states the intent applies in; empty means every state
+    states: List[str] = field(default_factory=list)
+    next_state: Optional[str] = None
+    schedules_meeting: bool = False
+
+@dataclass
+class IntentMatch:
+    intent: Intent
+    confidence: float
+
+DEFAULT_INTENTS = [
+    Intent(
+        name="who_is_calling",
+        phrases=["quien habla", "quien es", "con quien hablo", "de donde llamas", "de donde me llamas", "de parte de quien"],
+        reply="Soy Laura, de TDX. Ayudamos a empresas a resolver atención lenta, sobrecarga operativa e innovación con inteligencia artificial. ¿Tienes un minuto?"
+    ),
+    Intent(
+        name="not_interested",
+        phrases=["no me interesa", "no gracias", "no estoy interesado", "no estoy interesada", "no nos interesa"],
+        reply="Entiendo, gracias por tu tiempo. Si más adelante quieres ver lo que la inteligencia artificial puede hacer por tu equipo, aquí estaremos. ¡Que tengas un excelente día!",
+        next_state="closing"
+    ),
+    Intent(
+        name="call_later",
+        phrases=["llamame luego", "llamame mas tarde", "llamame despues", "ahora no puedo", "estoy ocupado", "estoy ocupada", "estoy en una reunion"],
+        reply="Claro, sin problema. ¿A qué hora te queda mejor que te vuelva a llamar?"
+    ),
+    Intent(
+        name="meeting_accept",
+        phrases=["si", "si claro", "claro", "claro que si", "perfecto", "de acuerdo", "me parece bien", "va", "dale", "esta bien"],
+        reply="¡Perfecto! Te envío la invitación para la reunión de veinticinco minutos. ¿A qué correo te la mando?",
+        states=["meeting_scheduling"],
+        next_state="closing",
+        schedules_meeting=True
+    )
+]
+
+def load_intents(path: Optional[str] = None) -> List[Intent]:
+    """Intents from a JSON file (a list of Intent objects), or the built-in defaults"""
+    path = path if path is not None else config.intent_router_file
+    if not path:
+        return list(DEFAULT_INTENTS)
+    with open(path, encoding="utf-8") as f:
+        return [Intent(**item) for item in json.load(f)]
+
+class IntentRouter:
+    """Answers predictable turns from templates so they skip the LLM round trip"""
+
+    def __init__(self, intents: Optional[List[Intent]] = None, min_confidence: Optional[float] = None):
+        self.intents = intents if intents is not None else load_intents()
+        self.min_confidence = min_confidence if min_confidence is not None else config.intent_router_min_confidence
+        # Phrases are normalized once; matching only compares word tuples
+        self._phrases: List[Tuple[Tuple[str, ...], Intent]] = [
+            (tuple(normalize_words(phrase)), intent)
+            for intent in self.intents
+            for phrase in intent.phrases
+        ]
+
+    def template_replies(self) -> List[str]:
+        return [intent.reply for intent in self.intents]
+
+    def route(self, text: str, state: str) -> Optional[IntentMatch]:
+        """Best intent for a transcript in the given state, or None when the LLM should answer"""
+        words = [word for word in normalize_words(text) if word not in FILLER_WORDS]
+        if not words:
+            return None
+
+        best: Optional[IntentMatch] = None
+        for phrase, intent in self._phrases:
+            if intent.states and state not in intent.states:
+                continue
+            size = len(phrase)
+            if size > len(words):
+                continue
+            # The phrase must appear as whole consecutive words; confidence is the share of the turn
+            # its occurrences explain, so a repeated answer ("si, si") counts every time it is said
+            covered = 0
+            i = 0
+            while i <= len(words) - size:
+                if tuple(words[i:i + size]) == phrase:
+                    covered += size
+                    i += size
+                else:
+                    i += 1
+            if covered:
+                confidence = covered / len(words)
+                if best is None or confidence > best.confidence:
+                    best = IntentMatch(intent=intent, confidence=confidence)
+
+        if best is None or best.confidence < self.min_confidence:
+            return None
+        logger.info(f"Intent routed: {best.intent.name} ({best.confidence:.2f}) in state {state}")
+        return best
+
+def register_template_audio(tts_service, router: Optional[IntentRouter] = None):
+    """Make template replies cacheable so routed turns replay pre-synthesized audio"""
+    if config.intent_router_enabled and config.intent_router_cache_audio:
+        tts_service.add_cacheable_phrases((router or IntentRouter()).template_replies())
+    return tts_service
@@ -0,0 +1,48 @@
+import os
+from loguru import logger
+
+from utils.config import config
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+class WorkerLoad:
+    """Worker load reported to LiveKit dispatch: the busier of active jobs and CPU.
+
+    Each signal is scaled so that reaching its configured limit equals the
+    load threshold, so the worker stops taking jobs as soon as either one is
+    saturated. Jobs run in their own processes, so the dispatcher's event-loop
+    lag says nothing about them; each job reports its own lag via LoopMonitor.
+    """
+
+    def __init__(self):
+        self.last_load = 0.0
+        if PSUTIL_AVAILABLE:
+            # First call primes the counters; later calls report usage since the previous one
+            psutil.cpu_percent(interval=None)
+
+    def cpu_percent(self) -> float:
+        if PSUTIL_AVAILABLE:
+            return psutil.cpu_percent(interval=None)
+        return os.getloadavg()[0] / (os.cpu_count() or 1) * 100
+
+    def __call__(self, worker=None) -> float:
+        active_jobs = len(worker.active_jobs) if worker is not None else 0
+        cpu = self.cpu_percent()
+
+        threshold = config.worker_load_threshold
+        load = min(max(
+            active_jobs / max(config.worker_max_jobs, 1) * threshold,
+            cpu / config.worker_max_cpu_percent * threshold
+        ), 1.0)
+
+        if (load >= threshold) != (self.last_load >= threshold):
+            state = "not accepting" if load >= threshold else "accepting"
+            logger.info(f"Worker {state} jobs: load={load:.2f} jobs={active_jobs} cpu={cpu:.0f}%")
+        self.last_load = load
+        return load
+
+worker_load = WorkerLoad()
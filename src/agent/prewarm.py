@@ -0,0 +1,30 @@
+import time
+from livekit.agents import JobProcess
+from livekit.plugins import silero
+from loguru import logger
+
+from agent.intent_router import register_template_audio
+from services.tts_service import UltraFastTTSService
+from utils.config import config
+from utils.process import memory_report
+
+def load_vad() -> silero.VAD:
+    return silero.VAD.load(
+        confidence=config.vad_confidence,
+        start_secs=config.vad_start_secs,
+        stop_secs=config.vad_stop_secs,
+        min_volume=config.vad_min_volume
+    )
+
+def prewarm(proc: JobProcess):
+    """Load heavy per-process resources once; every job run by this process reuses them"""
+    logger.info(memory_report("prewarm start"))
+    started = time.monotonic()
+    
+    proc.userdata["vad"] = load_vad()
+    
+    # Map cached greeting/canned phrases and intent templates into memory before the first call needs them
+    cached = register_template_audio(UltraFastTTSService()).preload_cache()
+    
+    logger.info(f"Prewarm done in {time.monotonic() - started:.2f}s ({cached} cached phrases)")
+    logger.info(memory_report("prewarm done"))
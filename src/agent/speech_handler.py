@@ -3,6 +3,9 @@ from typing import AsyncGenerator, Optional
 from loguru import logger
 from ..services.groq_service import GroqSTTService, GroqLLMService
 from ..services.tts_service import UltraFastTTSService
+from ..utils.config import TECHNICAL_ERROR_REPLY
+from ..utils.text_segmenter import segment_text_stream
+from .turn import Turn
 
 class SpeechHandler:
     def __init__(self):
@@ -10,6 +13,7 @@ class SpeechHandler:
         self.llm_service = GroqLLMService()
         self.tts_service = UltraFastTTSService()
         self.is_processing = False
+        self.current_turn: Optional[Turn] = None
         
     async def process_speech_pipeline(self, audio_data: bytes) -> AsyncGenerator[bytes, None]:
         if self.is_processing:
@@ -17,33 +21,84 @@ class SpeechHandler:
             return
             
         self.is_processing = True
-        try:
-            transcribed_text = await self.stt_service.transcribe(audio_data)
-            if not transcribed_text:
-                logger.debug("No transcription result")
-                return
-                
-            logger.info(f"Transcribed: {transcribed_text}")
-            
-            response_text = ""
-            async for chunk in self.llm_service.generate_response(transcribed_text):
-                response_text += chunk
-            
-            if response_text:
-                logger.info(f"LLM Response: {response_text}")
-                async for audio_chunk in self.tts_service.synthesize_speech(response_text):
-                    yield audio_chunk
+        turn = Turn()
+        self.current_turn = turn
+        # Small bound so "spoken" segments track what the consumer has actually taken
+        output: asyncio.Queue = asyncio.Queue(maxsize=4)
+        
+        async def run():
+            try:
+                transcribed_text = await self.stt_service.transcribe(audio_data)
+                if not transcribed_text:
+                    logger.debug("No transcription result")
+                    return
                     
-        except Exception as e:
-            logger.error(f"Speech pipeline error: {e}")
+                logger.info(f"Transcribed: {transcribed_text}")
+                turn.user_text = transcribed_text
+                
+                response_parts = []
+                llm_failed = False
+                
+                async def llm_text():
+                    nonlocal llm_failed
+                    try:
+                        async for chunk in self.llm_service.generate_response(transcribed_text):
+                            response_parts.append(chunk)
+                            yield chunk
+                    except Exception:
+                        llm_failed = True
+                
+                # Each finished phrase goes to TTS while the LLM is still generating
+                async for audio_chunk in self.tts_service.synthesize_segments(
+                    segment_text_stream(llm_text()),
+                    on_segment_done=turn.mark_spoken
+                ):
+                    await output.put(audio_chunk.data)
+                
+                if llm_failed and not response_parts:
+                    # One phrase, not segmented, so it replays from the TTS phrase cache
+                    async for audio_chunk in self.tts_service.synthesize_speech(TECHNICAL_ERROR_REPLY):
+                        await output.put(audio_chunk.data)
+                    turn.mark_spoken(TECHNICAL_ERROR_REPLY)
+                
+                if response_parts:
+                    logger.info(f"LLM Response: {''.join(response_parts)}")
+                        
+            except Exception as e:
+                logger.error(f"Speech pipeline error: {e}")
+        
+        task = turn.spawn(run())
+        try:
+            # Drain audio until the turn finishes; an interruption drops whatever is still queued
+            while not turn.cancelled:
+                if task.done():
+                    if output.empty():
+                        break
+                    yield output.get_nowait()
+                    continue
+                getter = asyncio.ensure_future(output.get())
+                await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    continue
+                yield getter.result()
         finally:
+            if not turn.done:
+                await turn.cancel()
+            if self.current_turn is turn:
+                self.current_turn = None
             self.is_processing = False
     
     async def handle_interruption(self):
-        if self.is_processing:
+        if self.is_processing and self.current_turn is not None:
             logger.info("Handling speech interruption")
+            turn = self.current_turn
+            await turn.cancel()
+            # Keep only what the caller actually heard in the LLM history
+            if turn.user_text is not None:
+                self.llm_service.truncate_last_response(turn.spoken_text)
             self.is_processing = False
     
     def reset_conversation(self):
         self.llm_service.clear_history()
-        logger.info("Conversation history cleared")
\ No newline at end of file
+        logger.info("Conversation history cleared")
@@ -0,0 +1,107 @@
+import asyncio
+import itertools
+from typing import AsyncGenerator, AsyncIterator, Coroutine, List, Optional, Set
+from loguru import logger
+
+from utils.config import config
+from utils.tracing import NULL_TRACE
+
+_turn_ids = itertools.count(1)
+_END = object()
+
+# Uncommitted speculative turns in this process, bounded by config.speculative_max_concurrent
+_active_speculations = 0
+
+class Turn:
+    """One user turn (STT, LLM stream, TTS stream, publish) as a group of tasks that can be cancelled together"""
+
+    def __init__(self, speculative: bool = False):
+        self.turn_id = next(_turn_ids)
+        self.user_text: Optional[str] = None
+        self.spoken_segments: List[str] = []
+        self.cancelled = False
+        self.tasks: Set[asyncio.Task] = set()
+        self.trace = NULL_TRACE
+        
+        # A speculative turn may run STT and LLM but must not speak until committed
+        self.speculative = speculative
+        self.committed = asyncio.Event()
+        self.history_checkpoint: Optional[int] = None
+        self._holds_slot = False
+        if not speculative:
+            self.committed.set()
+
+    @classmethod
+    def try_speculative(cls) -> Optional["Turn"]:
+        """Start a speculative turn if a speculation slot is free, otherwise None"""
+        global _active_speculations
+        if _active_speculations >= config.speculative_max_concurrent:
+            return None
+        _active_speculations += 1
+        turn = cls(speculative=True)
+        turn._holds_slot = True
+        return turn
+
+    def commit(self):
+        """Confirm a speculative turn; its buffered response may now be spoken"""
+        self._release_slot()
+        self.committed.set()
+
+    def _release_slot(self):
+        global _active_speculations
+        if self._holds_slot:
+            self._holds_slot = False
+            _active_speculations -= 1
+
+    def prefetch(self, stream: AsyncIterator) -> AsyncGenerator:
+        """Start consuming `stream` now and replay it, in order, whenever the caller is ready"""
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def pull():
+            try:
+                async for item in stream:
+                    queue.put_nowait(item)
+            finally:
+                queue.put_nowait(_END)
+
+        self.spawn(pull())
+
+        async def replay():
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    return
+                yield item
+
+        return replay()
+
+    def spawn(self, coro: Coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def mark_spoken(self, segment: str):
+        self.spoken_segments.append(segment)
+
+    @property
+    def spoken_text(self) -> str:
+        return " ".join(self.spoken_segments)
+
+    @property
+    def done(self) -> bool:
+        return not self.tasks
+
+    async def cancel(self, timeout: Optional[float] = None):
+        """Cancel every in-flight request of this turn, waiting at most `timeout` for cleanup"""
+        if timeout is None:
+            timeout = config.barge_in_cancel_timeout_secs
+        self.cancelled = True
+        self._release_slot()
+        pending = list(self.tasks)
+        for task in pending:
+            task.cancel()
+        if pending:
+            _, still_running = await asyncio.wait(pending, timeout=timeout)
+            if still_running:
+                logger.warning(f"Turn {self.turn_id}: {len(still_running)} task(s) still cleaning up after cancel")
@@ -0,0 +1,162 @@
+from collections import deque
+from typing import Deque, Optional
+from livekit import rtc
+import numpy as np
+from loguru import logger
+
+from utils.config import config
+
+class PCMBuffer:
+    """Preallocated int16 PCM buffer that grows geometrically instead of per frame"""
+
+    def __init__(self, num_channels: int = 1, initial_samples: int = 16000 * 5):
+        self.num_channels = num_channels
+        self._data = np.empty(initial_samples * num_channels, dtype=np.int16)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size // self.num_channels
+
+    def append(self, samples: np.ndarray):
+        needed = self._size + samples.size
+        if needed > self._data.size:
+            capacity = self._data.size
+            while capacity < needed:
+                capacity *= 2
+            grown = np.empty(capacity, dtype=np.int16)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:needed] = samples
+        self._size = needed
+
+    def view(self, samples_per_channel: Optional[int] = None) -> np.ndarray:
+        """Return the buffered samples without copying"""
+        end = self._size if samples_per_channel is None else min(self._size, samples_per_channel * self.num_channels)
+        return self._data[:end]
+
+    def clear(self):
+        self._size = 0
+
+class UtteranceAssembler:
+    """Collect VAD-flagged frames into whole utterances so each one costs a single STT request"""
+
+    def __init__(
+        self,
+        pre_roll_secs: Optional[float] = None,
+        post_roll_secs: Optional[float] = None,
+        end_silence_secs: Optional[float] = None,
+        min_speech_secs: Optional[float] = None,
+        max_utterance_secs: Optional[float] = None
+    ):
+        self.pre_roll_secs = pre_roll_secs if pre_roll_secs is not None else config.utterance_pre_roll_secs
+        self.post_roll_secs = post_roll_secs if post_roll_secs is not None else config.utterance_post_roll_secs
+        self.end_silence_secs = end_silence_secs if end_silence_secs is not None else config.vad_stop_secs
+        self.min_speech_secs = min_speech_secs if min_speech_secs is not None else config.utterance_min_speech_secs
+        self.max_utterance_secs = max_utterance_secs if max_utterance_secs is not None else config.utterance_max_secs
+
+        self.sample_rate: Optional[int] = None
+        self.num_channels: Optional[int] = None
+        self.buffer: Optional[PCMBuffer] = None
+        self.in_speech = False
+
+        self._pre_roll: Deque[np.ndarray] = deque()
+        self._pre_roll_samples = 0
+        self._speech_samples = 0
+        self._last_speech_end = 0
+        self._silence_samples = 0
+        self._provisional_taken = False
+
+    def _reset_format(self, frame: rtc.AudioFrame):
+        self.sample_rate = frame.sample_rate
+        self.num_channels = frame.num_channels
+        self.buffer = PCMBuffer(frame.num_channels, int(frame.sample_rate * max(self.max_utterance_secs / 4, 1.0)))
+        self._pre_roll.clear()
+        self._pre_roll_samples = 0
+        self.in_speech = False
+
+    def push(self, frame: rtc.AudioFrame, speech_detected: bool) -> Optional[rtc.AudioFrame]:
+        """Feed one frame and its VAD decision; returns the utterance once its endpoint is reached"""
+        if frame.sample_rate != self.sample_rate or frame.num_channels != self.num_channels:
+            self._reset_format(frame)
+
+        samples = np.frombuffer(frame.data, dtype=np.int16)
+        frame_samples = samples.size // self.num_channels
+
+        if not self.in_speech:
+            if not speech_detected:
+                self._remember_pre_roll(samples, frame_samples)
+                return None
+            self._start_utterance()
+
+        self.buffer.append(samples)
+        if speech_detected:
+            self._speech_samples += frame_samples
+            self._silence_samples = 0
+            self._last_speech_end = len(self.buffer)
+            self._provisional_taken = False
+        else:
+            self._silence_samples += frame_samples
+
+        if self._silence_samples >= self.end_silence_secs * self.sample_rate:
+            return self._finish_utterance()
+        if len(self.buffer) >= self.max_utterance_secs * self.sample_rate:
+            logger.debug("Utterance reached max length, forcing endpoint")
+            return self._finish_utterance()
+        return None
+
+    def provisional(self, silence_secs: float) -> Optional[rtc.AudioFrame]:
+        """Snapshot the utterance once per pause of at least silence_secs, before the real endpoint"""
+        if not self.in_speech or self._provisional_taken:
+            return None
+        if self._silence_samples < silence_secs * self.sample_rate:
+            return None
+        if self._speech_samples < self.min_speech_secs * self.sample_rate:
+            return None
+        self._provisional_taken = True
+        return self._snapshot()
+
+    def _remember_pre_roll(self, samples: np.ndarray, frame_samples: int):
+        self._pre_roll.append(samples.copy())
+        self._pre_roll_samples += frame_samples
+        max_samples = self.pre_roll_secs * self.sample_rate
+        while self._pre_roll and self._pre_roll_samples - self._pre_roll[0].size // self.num_channels >= max_samples:
+            self._pre_roll_samples -= self._pre_roll.popleft().size // self.num_channels
+
+    def _start_utterance(self):
+        self.in_speech = True
+        self.buffer.clear()
+        for samples in self._pre_roll:
+            self.buffer.append(samples)
+        self._pre_roll.clear()
+        self._pre_roll_samples = 0
+        self._speech_samples = 0
+        self._silence_samples = 0
+        self._last_speech_end = 0
+        self._provisional_taken = False
+
+    def _snapshot(self) -> rtc.AudioFrame:
+        end = min(len(self.buffer), self._last_speech_end + int(self.post_roll_secs * self.sample_rate))
+        return rtc.AudioFrame(
+            data=self.buffer.view(end).tobytes(),
+            sample_rate=self.sample_rate,
+            num_channels=self.num_channels,
+            samples_per_channel=end
+        )
+
+    def _finish_utterance(self) -> Optional[rtc.AudioFrame]:
+        self.in_speech = False
+        if self._speech_samples < self.min_speech_secs * self.sample_rate:
+            logger.debug("Discarding utterance shorter than min speech duration")
+            self.buffer.clear()
+            return None
+
+        utterance = self._snapshot()
+        self.buffer.clear()
+        return utterance
+
+    def reset(self):
+        self.in_speech = False
+        self._pre_roll.clear()
+        self._pre_roll_samples = 0
+        if self.buffer:
+            self.buffer.clear()
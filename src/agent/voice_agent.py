@@ -1,5 +1,5 @@
 import asyncio
-from typing import Optional
+from typing import AsyncGenerator, AsyncIterator, Callable, Dict, Optional, Set
 from livekit import rtc
 from livekit.agents import AutoSubscribe, JobContext, WorkerOptions, cli, llm
 from livekit import agents
@@ -9,9 +9,21 @@ from livekit.plugins import openai, silero
 import numpy as np
 from loguru import logger
 
+from agent.audio_publisher import AudioPublisher
+from agent.conversation import ConversationManager
+from agent.intent_router import IntentRouter, register_template_audio
+from agent.load import worker_load
+from agent.prewarm import load_vad, prewarm
+from agent.turn import Turn
+from agent.utterance import UtteranceAssembler
+from services.clients import provider_clients
 from services.groq_service import GroqSTTService, GroqLLMService
-from services.tts_service import UltraFastTTSService
-from utils.config import config
+from services.tts_service import TTS_SAMPLE_RATE, UltraFastTTSService
+from utils.config import REPEAT_REPLY, TECHNICAL_ERROR_REPLY, config
+from utils.text_segmenter import segment_text_stream
+from utils.loop_monitor import start_diagnostics
+from utils.process import memory_report
+from utils.tracing import trace_mark, tracer
 
 class GroqSTTAdapter(StreamAdapter):
     def __init__(self):
@@ -20,7 +32,11 @@ class GroqSTTAdapter(StreamAdapter):
     
     async def recognize(self, *, buffer: rtc.AudioFrame, language: str = "es") -> str:
         audio_data = buffer.data.tobytes()
-        result = await self.groq_stt.transcribe(audio_data)
+        result = await self.groq_stt.transcribe(
+            audio_data,
+            sample_rate=buffer.sample_rate,
+            num_channels=buffer.num_channels
+        )
         return result or ""
 
 class GroqLLMAdapter:
@@ -29,7 +45,7 @@ class GroqLLMAdapter:
     
     async def chat(self, *, chat_ctx: list, fnc_ctx: Optional[list] = None):
         if chat_ctx:
-            last_message = chat_ctx[-1].content
+            last_message = chat_ctx[-1]["content"]
             async for chunk in self.groq_llm.generate_response(last_message):
                 yield chunk
 
@@ -41,140 +57,401 @@ class FastTTSAdapter(TTSStreamAdapter):
     async def synthesize(self, *, text: str) -> rtc.AudioFrame:
         audio_chunks = []
         async for chunk in self.tts_service.synthesize_speech(text, use_streaming=True):
-            audio_chunks.append(chunk)
+            audio_chunks.append(chunk.data)
         
         if audio_chunks:
             audio_data = b''.join(audio_chunks)
+            audio_data = audio_data[:len(audio_data) - len(audio_data) % 2]
             return rtc.AudioFrame(
                 data=np.frombuffer(audio_data, dtype=np.int16),
-                sample_rate=24000,
+                sample_rate=TTS_SAMPLE_RATE,
                 num_channels=1
             )
-        return rtc.AudioFrame(data=np.array([], dtype=np.int16), sample_rate=24000, num_channels=1)
+        return rtc.AudioFrame(data=np.array([], dtype=np.int16), sample_rate=TTS_SAMPLE_RATE, num_channels=1)
+    
+    async def stream(self, *, text: str) -> AsyncGenerator[bytes, None]:
+        """Yield TTS PCM chunks as soon as the provider sends them"""
+        async for chunk in self.tts_service.synthesize_speech(text, use_streaming=True):
+            yield chunk.data
+    
+    async def synthesize_stream(
+        self,
+        *,
+        text_stream: AsyncIterator[str],
+        on_segment_done: Optional[Callable[[str], None]] = None
+    ) -> AsyncGenerator[bytes, None]:
+        """Synthesize each finished phrase of a streaming response while the rest is generated"""
+        async for chunk in self.tts_service.synthesize_segments(segment_text_stream(text_stream), on_segment_done):
+            yield chunk.data
+
+def is_sip_participant(participant: rtc.RemoteParticipant) -> bool:
+    return participant.kind == rtc.ParticipantKind.PARTICIPANT_KIND_SIP
 
 class VoiceAgent:
-    def __init__(self):
+    """Room-level agent: providers and VAD are shared; each participant gets its own session and voice track"""
+    
+    def __init__(self, room: Optional[rtc.Room] = None, vad: Optional[silero.VAD] = None):
         self.groq_stt = GroqSTTAdapter()
-        self.groq_llm = GroqLLMAdapter()
         self.fast_tts = FastTTSAdapter()
+        self.intent_router = IntentRouter() if config.intent_router_enabled else None
+        if self.intent_router is not None:
+            register_template_audio(self.fast_tts.tts_service, self.intent_router)
+        self.room = room
+        self.call_id = room.name if room is not None else "local"
         
-        self.vad = silero.VAD.load(
-            confidence=config.vad_confidence,
-            start_secs=config.vad_start_secs,
-            stop_secs=config.vad_stop_secs,
-            min_volume=config.vad_min_volume
-        )
-        
-        self.voice_assistant = None
-        self.conversation_started = False
-        self.chat_history = []
+        # Reuse the worker's prewarmed model; loading per job costs time and memory
+        self.vad = vad if vad is not None else load_vad()
         
+        self.sessions: Dict[str, "ParticipantSession"] = {}
+    
+    def session_for(self, participant: rtc.RemoteParticipant) -> "ParticipantSession":
+        session = self.sessions.get(participant.identity)
+        if session is None:
+            session = ParticipantSession(self, participant.identity)
+            self.sessions[participant.identity] = session
+        return session
+    
     async def on_participant_connected(self, participant: rtc.RemoteParticipant):
         logger.info(f"Participant connected: {participant.identity}")
+        # Only the phone caller is greeted; supervisors or other joiners just get a session
+        await self.session_for(participant).start(greet=is_sip_participant(participant))
+    
+    async def on_participant_disconnected(self, participant: rtc.RemoteParticipant):
+        logger.info(f"Participant disconnected: {participant.identity}")
+        session = self.sessions.pop(participant.identity, None)
+        if session is not None:
+            await session.close()
+    
+    def handle_audio_stream(self, audio_track: rtc.AudioTrack, participant: rtc.RemoteParticipant) -> Optional[asyncio.Task]:
+        """Bind an audio track to its participant's session"""
+        return self.session_for(participant).attach(audio_track)
+    
+    async def join_existing(self, participant: rtc.RemoteParticipant):
+        """Pick up a participant that was in the room before the agent, including tracks already subscribed"""
+        for publication in participant.track_publications.values():
+            if publication.track is not None and publication.kind == rtc.TrackKind.KIND_AUDIO:
+                self.handle_audio_stream(publication.track, participant)
+        await self.on_participant_connected(participant)
+    
+    async def aclose(self):
+        sessions = list(self.sessions.values())
+        self.sessions.clear()
+        await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+
+class ParticipantSession:
+    """Conversation with one participant: its own audio buffers, transcript, state and turns"""
+    
+    def __init__(self, agent: VoiceAgent, identity: str):
+        self.agent = agent
+        self.identity = identity
+        self.groq_llm = GroqLLMAdapter()
+        self.conversation = ConversationManager()
+        self.active = False
+        self.current_turn: Optional[Turn] = None
+        self.speculative_turn: Optional[Turn] = None
+        self.audio_tasks: Set[asyncio.Task] = set()
+        self.attached_tracks: Set[str] = set()
         
-        # Create a voice assistant session
-        self.voice_assistant = {
-            'vad': self.vad,
-            'stt': self.groq_stt,
-            'llm': self.groq_llm,
-            'tts': self.fast_tts,
-            'active': True
-        }
+        # Each session speaks on its own track, so replies and barge-in flushes never mix between participants
+        self.publisher = None
+        if agent.room is not None:
+            self.publisher = AudioPublisher(agent.room, sample_rate=TTS_SAMPLE_RATE, track_name=f"laura-voice-{identity}")
+        
+        # Shared, stateless per call
+        self.groq_stt = agent.groq_stt
+        self.fast_tts = agent.fast_tts
+        self.intent_router = agent.intent_router
+        self.vad = agent.vad
+        self.call_id = agent.call_id
+    
+    async def start(self, greet: bool = True):
+        """Open the session, with Laura's greeting when `greet` is set (once per session)"""
+        if self.active:
+            return
+        self.active = True
         
-        # Initialize conversation with Laura's greeting
-        self.chat_history = [
-            {"role": "system", "content": config.system_prompt},
-            {"role": "assistant", "content": "¡Hola! Soy Laura de TDX. Ayudo a líderes empresariales con retos tecnológicos como atención lenta, sobrecarga operativa y necesidad de innovar rápido. ¿Alguno de estos temas resuena contigo?"}
-        ]
+        if self.publisher is not None:
+            await self.publisher.start()
         
-        # Send initial greeting
-        await self.send_initial_greeting()
-        logger.info("Voice assistant started for participant with Laura SDR greeting")
+        if not greet:
+            logger.info(f"Voice assistant listening to {self.identity} without greeting")
+            return
+        
+        # The greeting runs as a turn, so barge-in stops it and the first reply never talks over it.
+        # Its checkpoint precedes the greeting, so an interrupted greeting is truncated to what was heard
+        turn = Turn()
+        turn.history_checkpoint = self.groq_llm.groq_llm.history_checkpoint()
+        self.groq_llm.groq_llm.transcript.add("assistant", config.greeting_text)
+        turn.spawn(self.send_initial_greeting(turn))
+        self.current_turn = turn
+        logger.info(f"Voice assistant started for {self.identity} with Laura SDR greeting")
+    
+    def attach(self, audio_track: rtc.AudioTrack) -> Optional[asyncio.Task]:
+        # A track can be reported both by track_subscribed and by the existing-participant scan
+        if audio_track.sid in self.attached_tracks:
+            return None
+        self.attached_tracks.add(audio_track.sid)
+        task = asyncio.create_task(self.handle_audio_stream(audio_track))
+        self.audio_tasks.add(task)
+        task.add_done_callback(self.audio_tasks.discard)
+        return task
     
-    async def send_initial_greeting(self):
+    async def send_initial_greeting(self, turn: Optional[Turn] = None):
         """Send Laura's initial greeting"""
         try:
-            greeting = "¡Hola! Soy Laura de TDX. Ayudo a líderes empresariales con retos tecnológicos como atención lenta, sobrecarga operativa y necesidad de innovar rápido. ¿Alguno de estos temas resuena contigo?"
+            greeting = config.greeting_text
             
-            # Generate TTS for greeting
-            audio_frame = await self.fast_tts.synthesize(text=greeting)
-            if audio_frame:
-                logger.info("Laura's greeting generated successfully")
-                # Note: In a full implementation, you'd publish this audio to the room
-                # For now, we log that the greeting was prepared
+            # Stream greeting TTS straight to the room
+            frames = await self.publish_audio(self.fast_tts.stream(text=greeting))
+            if turn is not None:
+                turn.mark_spoken(greeting)
+            if frames:
+                logger.info(f"Laura's greeting published ({frames} frames)")
             
         except Exception as e:
             logger.error(f"Error generating initial greeting: {e}")
     
-    async def on_participant_disconnected(self, participant: rtc.RemoteParticipant):
-        logger.info(f"Participant disconnected: {participant.identity}")
-        if self.voice_assistant:
-            self.voice_assistant['active'] = False
-            self.voice_assistant = None
-            self.conversation_started = False
-            self.chat_history = []
+    async def close(self):
+        """Stop listening and cancel every turn; the session is not reused"""
+        self.active = False
+        for task in list(self.audio_tasks):
+            task.cancel()
+        await self.discard_speculation()
+        if self.current_turn is not None:
+            await self.current_turn.cancel()
+            self.current_turn = None
+        self.groq_llm.groq_llm.clear_history()
+        if self.publisher is not None:
+            await self.publisher.aclose()
     
     async def handle_audio_stream(self, audio_track: rtc.AudioTrack):
-        logger.info("Starting audio stream handling for Laura SDR")
+        logger.info(f"Starting audio stream handling for {self.identity}")
+        utterances = UtteranceAssembler()
+        speech_secs = 0.0
         
         async for frame in audio_track:
-            if self.voice_assistant and self.voice_assistant.get('active'):
+            if self.active:
                 try:
                     # Process audio with VAD
                     vad_result = await self.vad.detect(frame)
                     
+                    # Sustained caller speech while a turn is running is a barge-in
                     if vad_result.speech_detected:
-                        logger.info("Speech detected, processing with STT")
-                        
-                        # Transcribe audio
-                        text = await self.groq_stt.recognize(buffer=frame, language="es")
+                        # The caller kept talking, so the speculative response is stale
+                        await self.discard_speculation()
+                        speech_secs += frame.samples_per_channel / frame.sample_rate
+                        if speech_secs >= config.barge_in_min_speech_secs:
+                            await self.interrupt_turn()
+                    else:
+                        speech_secs = 0.0
+                    
+                    # Only a completed utterance goes to STT, never a single frame
+                    utterance = utterances.push(frame, vad_result.speech_detected)
+                    
+                    if utterance is not None:
+                        logger.info(f"Utterance complete ({utterance.samples_per_channel / utterance.sample_rate:.2f}s), processing with STT")
                         
-                        if text and text.strip():
-                            logger.info(f"User said: {text}")
-                            
-                            # Add user message to chat history
-                            self.chat_history.append({"role": "user", "content": text})
-                            
-                            # Generate Laura's response
-                            response = await self.generate_laura_response(text)
-                            
-                            if response:
-                                logger.info(f"Laura responds: {response}")
-                                
-                                # Add Laura's response to chat history
-                                self.chat_history.append({"role": "assistant", "content": response})
-                                
-                                # Generate and send TTS
-                                await self.send_tts_response(response)
+                        if self.speculative_turn is not None:
+                            # Endpoint confirmed: speak the response that is already streaming
+                            turn = self.speculative_turn
+                            self.speculative_turn = None
+                            await self.interrupt_turn()
+                            turn.commit()
+                            turn.trace.mark("vad_end")
+                            self.current_turn = turn
+                            logger.info(f"Committed speculative turn {turn.turn_id}")
+                        else:
+                            # Run the turn in the background so VAD keeps watching for barge-in
+                            await self.interrupt_turn()
+                            turn = Turn()
+                            turn.trace = tracer.start_turn(self.call_id, turn.turn_id)
+                            turn.trace.mark("vad_end")
+                            turn.history_checkpoint = self.groq_llm.groq_llm.history_checkpoint()
+                            turn.spawn(self.run_turn(turn, utterance))
+                            self.current_turn = turn
+                    
+                    elif config.speculative_enabled and self.speculative_turn is None:
+                        provisional = utterances.provisional(config.speculative_silence_secs)
+                        if provisional is not None:
+                            await self.start_speculation(provisional)
                 
                 except Exception as e:
                     logger.error(f"Error processing audio frame: {e}")
     
+    async def run_turn(self, turn: Turn, utterance: rtc.AudioFrame):
+        """STT, LLM and TTS for one utterance; cancelled as a whole on barge-in"""
+        tracer.activate(turn.trace)
+        status = "ok"
+        try:
+            # Transcribe audio
+            text = await self.groq_stt.recognize(
+                buffer=utterance,
+                language="es"
+            )
+            
+            if text and text.strip():
+                logger.info(f"User said: {text}")
+                turn.user_text = text
+                
+                match = None
+                if self.intent_router is not None:
+                    match = self.intent_router.route(text, self.conversation.conversation_state)
+                
+                if match is not None:
+                    # Predictable turn: answer from the template, no LLM round trip
+                    trace_mark("intent_routed")
+                    response = match.intent.reply
+                    await turn.committed.wait()
+                    transcript = self.groq_llm.groq_llm.transcript
+                    transcript.add("user", text)
+                    transcript.add("assistant", response)
+                    await self.send_template_reply(response, turn)
+                else:
+                    # Stream Laura's response into TTS phrase by phrase
+                    response_parts = []
+                    llm_failed = False
+                    
+                    async def response_text():
+                        nonlocal llm_failed
+                        try:
+                            async for chunk in self.stream_laura_response(text):
+                                response_parts.append(chunk)
+                                yield chunk
+                        except Exception as e:
+                            llm_failed = True
+                            logger.error(f"Error generating Laura's response: {e}")
+                    
+                    llm_stream = response_text()
+                    if turn.speculative:
+                        # Let the LLM run ahead while we wait for the endpoint to be confirmed
+                        llm_stream = turn.prefetch(llm_stream)
+                        await turn.committed.wait()
+                    
+                    await self.send_tts_stream(llm_stream, on_segment_done=turn.mark_spoken)
+                    response = "".join(response_parts).strip()
+                    if not response:
+                        # Spoken whole, not segmented, so the fallback replays from the phrase cache
+                        response = TECHNICAL_ERROR_REPLY if llm_failed else REPEAT_REPLY
+                        await self.send_template_reply(response, turn)
+                
+                if response:
+                    logger.info(f"Laura responds: {response}")
+                
+                if match is not None and match.intent.next_state:
+                    self.conversation.transition(match.intent.next_state, match.intent.schedules_meeting)
+                    self.conversation.extract_pain_points(text)
+                else:
+                    self.conversation.process_turn(text, response)
+        
+        except asyncio.CancelledError:
+            status = "cancelled" if turn.committed.is_set() else "discarded"
+            raise
+        except Exception as e:
+            status = "error"
+            logger.error(f"Error processing turn {turn.turn_id}: {e}")
+        finally:
+            turn.trace.finish(status)
+    
+    async def start_speculation(self, utterance: rtc.AudioFrame):
+        """Start STT and LLM on a provisional pause; nothing is spoken until the endpoint is confirmed"""
+        # A pause that short is not a barge-in. While Laura is still speaking, wait for the real
+        # endpoint, which interrupts her the same way as a committed speculative turn would
+        if self.current_turn is not None and not self.current_turn.done:
+            return
+        
+        turn = Turn.try_speculative()
+        if turn is None:
+            logger.debug("Speculation limit reached, waiting for the real endpoint")
+            return
+        
+        turn.trace = tracer.start_turn(self.call_id, turn.turn_id, speculative=True)
+        turn.history_checkpoint = self.groq_llm.groq_llm.history_checkpoint()
+        turn.spawn(self.run_turn(turn, utterance))
+        self.speculative_turn = turn
+        logger.debug(f"Started speculative turn {turn.turn_id}")
+    
+    async def discard_speculation(self):
+        """Drop an uncommitted speculative turn and any history it recorded"""
+        turn = self.speculative_turn
+        if turn is None:
+            return
+        self.speculative_turn = None
+        await turn.cancel()
+        if turn.history_checkpoint is not None:
+            self.groq_llm.groq_llm.rollback(turn.history_checkpoint)
+        logger.debug(f"Discarded speculative turn {turn.turn_id}")
+    
+    async def interrupt_turn(self):
+        """Stop the current turn: cancel provider requests, flush queued audio, keep only what was said"""
+        turn = self.current_turn
+        if turn is None or turn.done:
+            return
+        
+        logger.info(f"Barge-in: cancelling turn {turn.turn_id}")
+        if self.publisher is not None:
+            self.publisher.clear()
+        await turn.cancel()
+        if self.publisher is not None:
+            self.publisher.clear()
+        self.current_turn = None
+        
+        # History should reflect only what the caller actually heard. A turn cancelled before its
+        # user message was recorded has nothing of its own to truncate
+        llm = self.groq_llm.groq_llm
+        if turn.history_checkpoint is not None and llm.history_checkpoint() > turn.history_checkpoint:
+            llm.truncate_last_response(turn.spoken_text)
+    
     async def generate_laura_response(self, user_input: str) -> str:
         """Generate Laura SDR's response using Groq LLM"""
+        response_chunks = []
         try:
-            # Prepare context for Laura
-            context = self.chat_history + [{"role": "user", "content": user_input}]
-            
-            # Generate response using Groq LLM
-            response_chunks = []
-            async for chunk in self.groq_llm.chat(chat_ctx=context):
+            async for chunk in self.stream_laura_response(user_input):
                 response_chunks.append(chunk)
-            
-            response = "".join(response_chunks).strip()
-            return response if response else "Disculpa, ¿podrías repetir eso?"
-            
         except Exception as e:
             logger.error(f"Error generating Laura's response: {e}")
-            return "Disculpa, tuve un problema técnico. ¿Podrías repetir tu pregunta?"
+            return TECHNICAL_ERROR_REPLY
+        return "".join(response_chunks).strip() or REPEAT_REPLY
+    
+    async def stream_laura_response(self, user_input: str) -> AsyncGenerator[str, None]:
+        """Stream Laura SDR's response from Groq LLM as it is generated; errors propagate to the caller"""
+        # The LLM service owns the transcript; only the new user message is passed in
+        context = [{"role": "user", "content": user_input}]
+        
+        async for chunk in self.groq_llm.chat(chat_ctx=context):
+            if chunk:
+                yield chunk
+    
+    async def publish_audio(self, chunks: AsyncIterator[bytes]) -> int:
+        """Publish TTS chunks to the room frame by frame as they arrive"""
+        if self.publisher is None:
+            logger.warning("No room attached to agent, dropping TTS audio")
+            async for _ in chunks:
+                pass
+            return 0
+        return await self.publisher.publish_stream(chunks)
+    
+    async def send_template_reply(self, reply: str, turn: Turn):
+        """Speak a fixed reply as one phrase so it replays from the TTS cache when pre-synthesized"""
+        frames = await self.publish_audio(self.fast_tts.stream(text=reply))
+        turn.mark_spoken(reply)
+        logger.info(f"Template reply published ({frames} frames)")
+    
+    async def send_tts_stream(self, text_stream: AsyncIterator[str], on_segment_done: Optional[Callable[[str], None]] = None):
+        """Generate and send TTS for a streaming response"""
+        try:
+            frames = await self.publish_audio(
+                self.fast_tts.synthesize_stream(text_stream=text_stream, on_segment_done=on_segment_done)
+            )
+            logger.info(f"TTS response published ({frames} frames)")
+            
+        except Exception as e:
+            logger.error(f"Error generating TTS response: {e}")
     
     async def send_tts_response(self, text: str):
         """Generate and send TTS response"""
         try:
-            audio_frame = await self.fast_tts.synthesize(text=text)
-            if audio_frame:
-                logger.info("TTS response generated successfully")
-                # Note: In a full implementation, you'd publish this audio to the room
+            frames = await self.publish_audio(self.fast_tts.stream(text=text))
+            logger.info(f"TTS response published ({frames} frames)")
                 
         except Exception as e:
             logger.error(f"Error generating TTS response: {e}")
@@ -186,10 +463,22 @@ async def entrypoint(ctx: JobContext):
     if ctx.room.name.startswith('call-'):
         logger.info(f"Detected SIP call room: {ctx.room.name}")
     
-    await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    # Open provider connections while the room connects so the first turn starts warm
+    if config.http_warm_on_start:
+        asyncio.create_task(provider_clients.warm_up())
+    provider_clients.start_keepalive()
+    start_diagnostics()
+    
+    agent = VoiceAgent(room=ctx.room, vad=ctx.proc.userdata.get("vad"))
+    logger.info(memory_report(f"job started for room {ctx.room.name}"))
     
-    agent = VoiceAgent()
+    async def log_job_memory():
+        logger.info(memory_report(f"job finished for room {ctx.room.name}"))
     
+    ctx.add_shutdown_callback(agent.aclose)
+    ctx.add_shutdown_callback(log_job_memory)
+    
+    # Handlers go in before the first await so no participant or track event can slip past them
     @ctx.room.on("participant_connected")
     def on_participant_connected(participant: rtc.RemoteParticipant):
         logger.info(f"Participant connected to room {ctx.room.name}: {participant.identity}")
@@ -204,7 +493,13 @@ async def entrypoint(ctx: JobContext):
     def on_track_subscribed(track: rtc.Track, publication: rtc.TrackPublication, participant: rtc.RemoteParticipant):
         if track.kind == rtc.TrackKind.KIND_AUDIO:
             logger.info(f"Audio track subscribed from {participant.identity}")
-            asyncio.create_task(agent.handle_audio_stream(track))
+            agent.handle_audio_stream(track, participant)
+    
+    await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    
+    # Participants that joined before the agent get no participant_connected event
+    for participant in list(ctx.room.remote_participants.values()):
+        asyncio.create_task(agent.join_existing(participant))
     
     logger.info(f"Voice agent initialized and listening for participants in room: {ctx.room.name}")
 
@@ -212,6 +507,9 @@ if __name__ == "__main__":
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
+            load_fnc=worker_load,
+            load_threshold=config.worker_load_threshold,
             ws_url=config.livekit_url,
             api_key=config.livekit_api_key,
             api_secret=config.livekit_api_secret
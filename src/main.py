@@ -2,10 +2,22 @@
 import asyncio
 import logging
 from livekit.agents import WorkerOptions, WorkerType, cli
+from agent.intent_router import register_template_audio
+from agent.load import worker_load
+from agent.prewarm import prewarm
 from agent.voice_agent import entrypoint
+from services.clients import provider_clients
+from services.tts_service import UltraFastTTSService
 from utils.config import config
 from utils.logger import setup_logger
 
+async def warm_tts_cache():
+    try:
+        await register_template_audio(UltraFastTTSService()).warm_cache()
+    finally:
+        # The worker runs on another loop; close this loop's pools rather than leak their connections
+        await provider_clients.aclose()
+
 def main():
     setup_logger()
     
@@ -17,9 +29,19 @@ def main():
     logger.info(f"Agent Name: {config.agent_name}")
     logger.info(f"VAD Config - Start: {config.vad_start_secs}s, Stop: {config.vad_stop_secs}s")
     
+    # Pre-synthesize the greeting, canned replies and intent templates so jobs replay them from disk
+    if config.tts_cache_enabled:
+        try:
+            asyncio.run(warm_tts_cache())
+        except Exception as e:
+            logger.warning(f"TTS cache warm-up failed: {e}")
+    
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
+            load_fnc=worker_load,
+            load_threshold=config.worker_load_threshold,
             worker_type=WorkerType.ROOM,
             ws_url=config.livekit_url,
             api_key=config.livekit_api_key,
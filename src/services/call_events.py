@@ -0,0 +1,215 @@
+"""
+Call lifecycle event store for the Twilio status webhooks.
+
+Webhooks only enqueue events; a background writer flushes them in batches to a
+local SQLite database in WAL mode, indexed by call SID and time. Rooms of
+finished calls are deleted in the background with bounded concurrency.
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"completed", "failed", "canceled", "busy", "no-answer"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS call_events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    call_sid TEXT NOT NULL,
+    status TEXT,
+    room_name TEXT,
+    payload TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_call_events_sid ON call_events (call_sid, ts);
+CREATE INDEX IF NOT EXISTS idx_call_events_ts ON call_events (ts);
+"""
+
+INSERT_EVENT = "INSERT INTO call_events (ts, call_sid, status, room_name, payload) VALUES (?, ?, ?, ?, ?)"
+
+def events_authorized(authorization: Optional[str], token: Optional[str] = None) -> bool:
+    """Bearer-token check for reading event history; payloads hold caller numbers, so no token means no access"""
+    token = token if token is not None else os.getenv('CALL_EVENTS_TOKEN')
+    if not token or not authorization:
+        return False
+    scheme, _, value = authorization.partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(value.strip().encode(), token.encode())
+
+class CallEventStore:
+    """Append-only call event history: O(1) enqueue on the request path, batched writes off it"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_queue: Optional[int] = None
+    ):
+        self.path = path or os.getenv('CALL_EVENTS_DB', 'logs/call_events.db')
+        self.batch_size = batch_size or int(os.getenv('CALL_EVENTS_BATCH_SIZE', '500'))
+        self.flush_interval = flush_interval or float(os.getenv('CALL_EVENTS_FLUSH_SECS', '0.5'))
+        self.max_queue = max_queue or int(os.getenv('CALL_EVENTS_MAX_QUEUE', '50000'))
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    async def start(self):
+        if self._writer is not None:
+            return
+        self._conn = await asyncio.to_thread(self._connect)
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._writer = asyncio.create_task(self._run())
+        logger.info(f"Call event store writing to {self.path}")
+
+    async def stop(self):
+        """Flush everything still queued and close the database"""
+        if self._writer is None:
+            return
+        # The sentinel queues behind pending events, so the writer drains them first
+        await self._queue.put(None)
+        await self._writer
+        self._writer = None
+        self._queue = None
+        self._conn.close()
+        self._conn = None
+
+    def record(self, call_sid: Optional[str], status: Optional[str], room_name: Optional[str] = None, fields: Optional[Dict] = None) -> bool:
+        """Enqueue an event; never blocks or touches disk. Returns False if the event was dropped"""
+        if self._queue is None:
+            logger.warning("Call event store not started, dropping event")
+            return False
+        # A malformed callback must not reach the batch, where it would fail the whole insert
+        if not call_sid:
+            logger.warning(f"Dropping call event without CallSid (status {status})")
+            return False
+        event = (time.time(), call_sid, status, room_name, json.dumps(fields or {}, separators=(',', ':')))
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Call event queue full, {self.dropped} events dropped so far")
+            return False
+        return True
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            event = await self._queue.get()
+            if event is None:
+                return
+            batch = [event]
+            # Let a burst accumulate so one transaction covers many webhooks
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if event is None:
+                    stopping = True
+                    break
+                batch.append(event)
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} call events: {e}")
+
+    def _write(self, batch: List[tuple]):
+        if not batch:
+            return
+        try:
+            with self._conn:
+                self._conn.executemany(INSERT_EVENT, batch)
+        except sqlite3.IntegrityError:
+            # The batch was rolled back; insert row by row so one bad event costs only itself
+            for event in batch:
+                try:
+                    with self._conn:
+                        self._conn.execute(INSERT_EVENT, event)
+                except sqlite3.IntegrityError as e:
+                    self.dropped += 1
+                    logger.warning(f"Dropping invalid call event {event[1:3]}: {e}")
+
+    def _query(self, call_sid: Optional[str], since: Optional[float], until: Optional[float], limit: int) -> List[Dict]:
+        clauses, params = [], []
+        if call_sid:
+            clauses.append("call_sid = ?")
+            params.append(call_sid)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        # Readers get their own connection; WAL lets them run alongside the writer
+        conn = sqlite3.connect(self.path)
+        try:
+            rows = conn.execute(
+                f"SELECT ts, call_sid, status, room_name, payload FROM call_events {where} ORDER BY ts DESC LIMIT ?",
+                (*params, limit)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [
+            {"ts": ts, "call_sid": sid, "status": status, "room_name": room, "fields": json.loads(payload or "{}")}
+            for ts, sid, status, room, payload in rows
+        ]
+
+    async def query(
+        self,
+        call_sid: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 100
+    ) -> List[Dict]:
+        return await asyncio.to_thread(self._query, call_sid, since, until, limit)
+
+class RoomCleaner:
+    """Deletes rooms of finished calls in the background, a bounded number at a time"""
+
+    def __init__(self, delete_room: Callable[[str], Awaitable[None]], concurrency: Optional[int] = None):
+        self.delete_room = delete_room
+        self._slots = asyncio.Semaphore(concurrency or int(os.getenv('ROOM_DELETE_CONCURRENCY', '4')))
+        self._pending: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def schedule(self, room_name: str):
+        # Twilio may send several terminal callbacks for one call; delete once
+        if room_name in self._pending:
+            return
+        self._pending.add(room_name)
+        task = asyncio.create_task(self._delete(room_name))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _delete(self, room_name: str):
+        try:
+            async with self._slots:
+                await self.delete_room(room_name)
+            logger.info(f"Deleted room {room_name}")
+        except Exception as e:
+            if getattr(e, "code", None) != "not_found":
+                logger.warning(f"Failed to delete room {room_name}: {e}")
+        finally:
+            self._pending.discard(room_name)
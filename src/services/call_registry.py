@@ -0,0 +1,145 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from loguru import logger
+from utils.config import config
+
+# Calls only move forward; "ended" is terminal and covers hangups, failures and explicit ends
+TRANSITIONS = {
+    "dialing": {"ringing", "answered", "ended"},
+    "ringing": {"answered", "ended"},
+    "answered": {"ended"},
+    "ended": set()
+}
+
+def normalize_phone(phone_number: str) -> str:
+    """Index key for a number: its E.164 digits without "+" (an unescaped "+" in a query string arrives as a space)"""
+    digits = "".join(char for char in phone_number if char.isdigit())
+    # "00" is the international prefix, the dialled form of "+"
+    return digits[2:] if digits.startswith("00") else digits
+
+class CallRecord:
+    __slots__ = ("call_id", "phone_number", "room_name", "participant_identity", "trunk_id",
+                 "agent_name", "campaign_id", "state", "timestamps", "end_reason", "end_code")
+
+    def __init__(self, phone_number: str, trunk_id: str, agent_name: str, campaign_id: Optional[str] = None):
+        self.call_id = uuid.uuid4().hex[:16]
+        self.phone_number = phone_number
+        digits = "".join(char for char in phone_number if char.isdigit())
+        # Unique per call, so concurrent dials to one number never share a room
+        self.room_name = f"call-{digits}-{self.call_id[:8]}"
+        self.participant_identity = f"caller-{phone_number}"
+        self.trunk_id = trunk_id
+        self.agent_name = agent_name
+        self.campaign_id = campaign_id
+        self.state = "dialing"
+        self.timestamps: Dict[str, float] = {"dialing": time.time()}
+        self.end_reason: Optional[str] = None
+        # SIP status code or LiveKit error code of a failed call, for retry decisions
+        self.end_code: Optional[str] = None
+
+    @property
+    def answered(self) -> bool:
+        return "answered" in self.timestamps
+
+    def to_dict(self) -> Dict:
+        return {
+            "call_id": self.call_id,
+            "phone_number": self.phone_number,
+            "room_name": self.room_name,
+            "trunk_id": self.trunk_id,
+            "agent_name": self.agent_name,
+            "campaign_id": self.campaign_id,
+            "state": self.state,
+            "timestamps": dict(self.timestamps),
+            "end_reason": self.end_reason,
+            "end_code": self.end_code
+        }
+
+class CallRegistry:
+    """In-memory index of calls by call ID, room and phone number; ended calls are kept up to a limit"""
+
+    def __init__(self, max_ended: Optional[int] = None):
+        self.max_ended = max_ended if max_ended is not None else config.call_registry_max_ended
+        self._by_id: Dict[str, CallRecord] = {}
+        self._by_room: Dict[str, CallRecord] = {}
+        # Insertion-ordered "sets" of call IDs, oldest first
+        self._by_phone: Dict[str, Dict[str, None]] = {}
+        self._ended: "OrderedDict[str, None]" = OrderedDict()
+        self._waiters: Dict[str, asyncio.Event] = {}
+        self.counts: Dict[str, int] = {state: 0 for state in TRANSITIONS}
+
+    def create(self, phone_number: str, trunk_id: str, agent_name: str, campaign_id: Optional[str] = None) -> CallRecord:
+        record = CallRecord(phone_number, trunk_id, agent_name, campaign_id)
+        self._by_id[record.call_id] = record
+        self._by_room[record.room_name] = record
+        self._by_phone.setdefault(normalize_phone(phone_number), {})[record.call_id] = None
+        self.counts["dialing"] += 1
+        return record
+
+    def get(self, call_id: str) -> Optional[CallRecord]:
+        return self._by_id.get(call_id)
+
+    def by_room(self, room_name: str) -> Optional[CallRecord]:
+        return self._by_room.get(room_name)
+
+    def by_phone(self, phone_number: str) -> List[CallRecord]:
+        """Calls to a number in any formatting ("+34 600-000-000" matches "+34600000000"), most recent first"""
+        call_ids = self._by_phone.get(normalize_phone(phone_number), {})
+        return [self._by_id[call_id] for call_id in reversed(call_ids)]
+
+    def list(self, state: Optional[str] = None, limit: int = 100) -> List[CallRecord]:
+        """Most recent calls first, optionally in one state"""
+        records = []
+        for record in reversed(self._by_id.values()):
+            if state is None or record.state == state:
+                records.append(record)
+                if len(records) >= limit:
+                    break
+        return records
+
+    async def wait_ended(self, call_id: str) -> Optional[CallRecord]:
+        """Wait until a call reaches "ended"; returns None for unknown calls"""
+        record = self._by_id.get(call_id)
+        if record is None or record.state == "ended":
+            return record
+        await self._waiters.setdefault(call_id, asyncio.Event()).wait()
+        return record
+
+    def transition(self, call_id: str, state: str, reason: Optional[str] = None, code: Optional[str] = None) -> bool:
+        """Move a call forward; returns False for unknown calls and backward or repeated transitions"""
+        record = self._by_id.get(call_id)
+        if record is None or state not in TRANSITIONS[record.state]:
+            return False
+
+        self.counts[record.state] -= 1
+        self.counts[state] += 1
+        record.state = state
+        record.timestamps[state] = time.time()
+        logger.info(f"Call {call_id} ({record.phone_number}) -> {state}" + (f": {reason}" if reason else ""))
+
+        if state == "ended":
+            record.end_reason = reason
+            record.end_code = code
+            waiter = self._waiters.pop(call_id, None)
+            if waiter is not None:
+                waiter.set()
+            self._ended[call_id] = None
+            while len(self._ended) > self.max_ended:
+                self._forget(self._ended.popitem(last=False)[0])
+        return True
+
+    def _forget(self, call_id: str):
+        record = self._by_id.pop(call_id)
+        self._by_room.pop(record.room_name, None)
+        self.counts["ended"] -= 1
+        phone_key = normalize_phone(record.phone_number)
+        calls = self._by_phone.get(phone_key)
+        if calls is not None:
+            calls.pop(call_id, None)
+            if not calls:
+                del self._by_phone[phone_key]
+
+call_registry = CallRegistry()
@@ -0,0 +1,236 @@
+import asyncio
+import random
+import time
+import uuid
+from typing import AsyncGenerator, Dict, List, Optional
+from loguru import logger
+from utils.config import config
+from .outbound_service import OutboundCallService
+
+# LiveKit Twirp error codes and SIP status codes that will not succeed on retry; "cancelled" marks calls ended via the API
+PERMANENT_SIP_ERRORS = {
+    "invalid_argument", "not_found", "permission_denied", "unauthenticated", "failed_precondition", "cancelled",
+    "400", "403", "404", "410", "484", "485", "488", "603", "604"
+}
+
+class TokenBucket:
+    """Paces call attempts to a trunk: `rate` calls per second with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int):
+        # A zero rate would divide by zero in acquire() and a negative one would spin it
+        if rate <= 0:
+            raise ValueError(f"Call rate must be positive, got {rate}")
+        if burst < 1:
+            raise ValueError(f"Call burst must be at least 1, got {burst}")
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # The lock keeps waiters in FIFO order so no campaign starves another on the same trunk
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class Campaign:
+    """A batch of numbers dialed by the CampaignDialer, with per-number results and live progress"""
+
+    def __init__(self, numbers: List[str], trunk_id: str, agent_name: str):
+        self.campaign_id = f"cmp-{uuid.uuid4().hex[:12]}"
+        self.trunk_id = trunk_id
+        self.agent_name = agent_name
+        self.status = "pending"
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.results: Dict[str, Dict] = {
+            number: {"status": "queued", "attempts": 0, "call_id": None, "room_name": None, "end_reason": None, "error": None}
+            for number in numbers
+        }
+        self.counts = {
+            "queued": len(self.results), "dialing": 0, "retrying": 0, "in_call": 0,
+            "completed": 0, "failed": 0, "cancelled": 0
+        }
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+        self._version = 0
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "cancelled")
+
+    def set_result(self, number: str, status: str, **fields):
+        result = self.results[number]
+        self.counts[result["status"]] -= 1
+        self.counts[status] += 1
+        result["status"] = status
+        result.update(fields)
+        self._notify()
+
+    def set_status(self, status: str):
+        self.status = status
+        if self.done:
+            self.finished_at = time.time()
+        self._notify()
+
+    def _notify(self):
+        # Wake every watcher once, then arm a fresh event for the next change
+        self._version += 1
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def progress(self) -> Dict:
+        total = len(self.results)
+        finished = self.counts["completed"] + self.counts["failed"] + self.counts["cancelled"]
+        return {
+            "campaign_id": self.campaign_id,
+            "status": self.status,
+            "trunk_id": self.trunk_id,
+            "total": total,
+            "finished": finished,
+            "percent": round(finished / total * 100, 1) if total else 100.0,
+            "counts": dict(self.counts),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+    async def watch(self, min_interval: float = 0.5) -> AsyncGenerator[Dict, None]:
+        """Yield a progress snapshot on every change (at most every `min_interval`) until the campaign ends"""
+        seen = -1
+        while True:
+            if self._version != seen:
+                seen = self._version
+                yield self.progress()
+                if self.done:
+                    return
+                await asyncio.sleep(min_interval)
+                continue
+            await self._changed.wait()
+
+class CampaignDialer:
+    """Runs campaigns inside the service: per-trunk pacing, a global cap on live calls and retries on SIP failures"""
+
+    def __init__(self, outbound_service: OutboundCallService):
+        self.outbound_service = outbound_service
+        self.campaigns: Dict[str, Campaign] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._call_slots = asyncio.Semaphore(config.campaign_max_concurrent_calls)
+
+    def _bucket(self, trunk_id: str) -> TokenBucket:
+        bucket = self._buckets.get(trunk_id)
+        if bucket is None:
+            rate = config.campaign_trunk_rates.get(trunk_id, config.campaign_calls_per_second)
+            bucket = TokenBucket(rate, config.campaign_burst)
+            self._buckets[trunk_id] = bucket
+        return bucket
+
+    def start(self, numbers: List[str], agent_name: Optional[str] = None, trunk_id: Optional[str] = None) -> Campaign:
+        # Normalize and drop duplicates so one number is never dialed twice by the same campaign
+        unique = list(dict.fromkeys(number.replace(" ", "") for number in numbers if number.strip()))
+        campaign = Campaign(unique, trunk_id or config.outbound_trunk_id, agent_name or config.agent_name)
+        # Build the trunk's pacer up front so a misconfigured rate fails the request, not the workers
+        self._bucket(campaign.trunk_id)
+        self.campaigns[campaign.campaign_id] = campaign
+        campaign.task = asyncio.create_task(self._run(campaign))
+        logger.info(f"Campaign {campaign.campaign_id} started with {len(unique)} numbers on trunk {campaign.trunk_id}")
+        return campaign
+
+    def get(self, campaign_id: str) -> Optional[Campaign]:
+        return self.campaigns.get(campaign_id)
+
+    async def cancel(self, campaign_id: str) -> bool:
+        campaign = self.campaigns.get(campaign_id)
+        if campaign is None or campaign.done:
+            return False
+        campaign.task.cancel()
+        await asyncio.gather(campaign.task, return_exceptions=True)
+        return True
+
+    async def _run(self, campaign: Campaign):
+        campaign.set_status("running")
+        queue: asyncio.Queue = asyncio.Queue()
+        for number in campaign.results:
+            queue.put_nowait(number)
+
+        # Workers only bound how many numbers are in flight; the global semaphore caps live calls
+        workers = [
+            asyncio.create_task(self._worker(campaign, queue))
+            for _ in range(min(config.campaign_max_concurrent_calls, len(campaign.results)) or 1)
+        ]
+        try:
+            await queue.join()
+            campaign.set_status("completed")
+            logger.info(f"Campaign {campaign.campaign_id} completed: {campaign.counts}")
+        except asyncio.CancelledError:
+            # Stop the workers first so none of them records the outcome of a call ended below
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            live_calls = [
+                result["call_id"] for result in campaign.results.values()
+                if result["status"] == "in_call" and result["call_id"]
+            ]
+            await asyncio.gather(
+                *(self.outbound_service.end_call_by_id(call_id) for call_id in live_calls),
+                return_exceptions=True
+            )
+            for number, result in campaign.results.items():
+                if result["status"] in ("queued", "dialing", "retrying", "in_call"):
+                    campaign.set_result(number, "cancelled", end_reason=result["end_reason"] or "campaign cancelled")
+            campaign.set_status("cancelled")
+            logger.info(f"Campaign {campaign.campaign_id} cancelled: {campaign.counts}")
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _worker(self, campaign: Campaign, queue: asyncio.Queue):
+        while True:
+            number = await queue.get()
+            try:
+                await self._dial_with_retries(campaign, number)
+            finally:
+                queue.task_done()
+
+    async def _dial_with_retries(self, campaign: Campaign, number: str):
+        bucket = self._bucket(campaign.trunk_id)
+        for attempt in range(1, config.campaign_max_attempts + 1):
+            await bucket.acquire()
+            async with self._call_slots:
+                campaign.set_result(number, "dialing", attempts=attempt)
+                try:
+                    record = await self.outbound_service.dial(
+                        number, campaign.agent_name, campaign.trunk_id, campaign_id=campaign.campaign_id
+                    )
+                except Exception as e:
+                    error = str(e)
+                    code = getattr(e, "code", None)
+                else:
+                    campaign.set_result(number, "in_call", call_id=record.call_id, room_name=record.room_name, error=None)
+                    # The slot is held for the whole call, so the cap bounds live calls rather than API requests
+                    await self.outbound_service.registry.wait_ended(record.call_id)
+                    if record.answered:
+                        campaign.set_result(number, "completed", end_reason=record.end_reason)
+                        return
+                    # Busy, no-answer and SIP errors only surface once the call has ended in the registry
+                    error = record.end_reason
+                    code = record.end_code
+
+            if code in PERMANENT_SIP_ERRORS or attempt == config.campaign_max_attempts:
+                campaign.set_result(number, "failed", error=error)
+                logger.warning(f"Campaign {campaign.campaign_id}: {number} failed after {attempt} attempt(s): {error}")
+                return
+
+            # Exponential backoff with jitter so retries from a failed burst do not arrive together
+            delay = min(config.campaign_retry_base_secs * 2 ** (attempt - 1), config.campaign_retry_max_secs)
+            delay *= random.uniform(0.8, 1.2)
+            campaign.set_result(number, "retrying", error=error)
+            logger.info(f"Campaign {campaign.campaign_id}: retrying {number} in {delay:.1f}s ({error})")
+            await asyncio.sleep(delay)
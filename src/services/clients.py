@@ -0,0 +1,154 @@
+import asyncio
+import os
+import time
+from typing import Dict, Iterable, Optional
+import httpx
+import openai
+from elevenlabs.client import AsyncElevenLabs
+from groq import AsyncGroq
+from loguru import logger
+from utils.config import config
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Hosts opened during warm-up; any response keeps the TLS connection in the pool
+WARM_URLS = {
+    "groq": "https://api.groq.com/",
+    "elevenlabs": "https://api.elevenlabs.io/",
+    "openai": "https://api.openai.com/"
+}
+
+class ProviderClients:
+    """Process-wide provider SDK clients sharing keep-alive HTTP pools, rebuilt per event loop"""
+
+    def __init__(self):
+        self._owner = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._http: Dict[str, httpx.AsyncClient] = {}
+        self._sdk: Dict[str, object] = {}
+        self._last_used: Dict[str, float] = {}
+        self._keepalive_task: Optional[asyncio.Task] = None
+
+    def _ensure_owner(self):
+        # Pools are tied to the loop (and process) that opened them
+        loop = asyncio.get_running_loop()
+        owner = (os.getpid(), id(loop))
+        if owner != self._owner:
+            # A forked child shares its parent's sockets and must only drop the inherited clients;
+            # in the same process the previous loop's clients are closed so their connections go too
+            if self._owner is not None and self._owner[0] == owner[0]:
+                self._close_stale(self._loop, list(self._http.values()), self._keepalive_task)
+            self._owner = owner
+            self._loop = loop
+            self._http = {}
+            self._sdk = {}
+            self._last_used = {}
+            self._keepalive_task = None
+
+    def http(self, provider: str) -> httpx.AsyncClient:
+        self._ensure_owner()
+        client = self._http.get(provider)
+        if client is None:
+            async def touch(request):
+                self._last_used[provider] = time.monotonic()
+
+            client = httpx.AsyncClient(
+                http2=config.http2_enabled and HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=config.http_pool_max_connections,
+                    max_keepalive_connections=config.http_pool_max_keepalive,
+                    keepalive_expiry=config.http_keepalive_expiry_secs
+                ),
+                timeout=httpx.Timeout(config.http_timeout_secs, connect=config.http_connect_timeout_secs),
+                event_hooks={"request": [touch]}
+            )
+            self._http[provider] = client
+        return client
+
+    @property
+    def groq(self) -> AsyncGroq:
+        self._ensure_owner()
+        if "groq" not in self._sdk:
+            self._sdk["groq"] = AsyncGroq(api_key=config.groq_api_key, http_client=self.http("groq"))
+        return self._sdk["groq"]
+
+    @property
+    def elevenlabs(self) -> AsyncElevenLabs:
+        self._ensure_owner()
+        if "elevenlabs" not in self._sdk:
+            self._sdk["elevenlabs"] = AsyncElevenLabs(api_key=config.elevenlabs_api_key, httpx_client=self.http("elevenlabs"))
+        return self._sdk["elevenlabs"]
+
+    @property
+    def openai(self) -> openai.AsyncOpenAI:
+        self._ensure_owner()
+        if "openai" not in self._sdk:
+            self._sdk["openai"] = openai.AsyncOpenAI(api_key=config.openai_api_key, http_client=self.http("openai"))
+        return self._sdk["openai"]
+
+    def _close_stale(self, loop: Optional[asyncio.AbstractEventLoop], clients: Iterable[httpx.AsyncClient], keepalive: Optional[asyncio.Task]):
+        if loop is None or loop.is_closed():
+            # Nothing can run on a finished loop; unreferenced clients release their sockets when collected
+            if clients:
+                logger.debug(f"Discarding {len(clients)} HTTP client(s) of a closed event loop")
+            return
+        asyncio.run_coroutine_threadsafe(self._close_clients(clients, keepalive), loop)
+
+    async def _close_clients(self, clients: Iterable[httpx.AsyncClient], keepalive: Optional[asyncio.Task]):
+        if keepalive is not None:
+            keepalive.cancel()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.debug(f"Failed to close HTTP client: {e}")
+
+    async def aclose(self):
+        """Close every pooled connection of the current loop, e.g. before a short-lived loop ends"""
+        if self._owner != (os.getpid(), id(asyncio.get_running_loop())):
+            return
+        clients, keepalive = list(self._http.values()), self._keepalive_task
+        self._owner = None
+        self._loop = None
+        self._http = {}
+        self._sdk = {}
+        self._last_used = {}
+        self._keepalive_task = None
+        await self._close_clients(clients, keepalive)
+
+    async def warm_up(self):
+        """Open a pooled connection to every provider so the next real request skips DNS/TCP/TLS"""
+        async def warm(provider: str, url: str):
+            started = time.monotonic()
+            try:
+                await self.http(provider).get(url)
+                logger.debug(f"Warmed {provider} connection in {(time.monotonic() - started) * 1000:.0f} ms")
+            except Exception as e:
+                logger.warning(f"Failed to warm {provider} connection: {e}")
+
+        await asyncio.gather(*(warm(provider, url) for provider, url in WARM_URLS.items()))
+
+    def start_keepalive(self):
+        """Re-warm providers that have been idle long enough for their connections to expire"""
+        self._ensure_owner()
+        if self._keepalive_task is not None or config.http_rewarm_idle_secs <= 0:
+            return
+
+        async def keepalive():
+            while True:
+                await asyncio.sleep(config.http_rewarm_idle_secs)
+                now = time.monotonic()
+                for provider, url in WARM_URLS.items():
+                    if now - self._last_used.get(provider, 0) >= config.http_rewarm_idle_secs:
+                        try:
+                            await self.http(provider).get(url)
+                        except Exception as e:
+                            logger.debug(f"Keep-alive to {provider} failed: {e}")
+
+        self._keepalive_task = asyncio.create_task(keepalive())
+
+provider_clients = ProviderClients()
@@ -1,21 +1,41 @@
 import asyncio
-from typing import AsyncGenerator, Optional
+from typing import AsyncGenerator, Dict, List, Optional
 from groq import AsyncGroq
 from loguru import logger
+from services.clients import provider_clients
+from services.transcript import ConversationTranscript
+from utils.audio import encode_for_stt
 from utils.config import config
+from utils.tracing import trace_mark
 
 class GroqSTTService:
     def __init__(self):
-        self.client = AsyncGroq(api_key=config.groq_api_key)
         self.model = config.groq_stt_model
+    
+    @property
+    def client(self) -> AsyncGroq:
+        return provider_clients.groq
         
-    async def transcribe(self, audio_data: bytes) -> Optional[str]:
+    async def transcribe(
+        self,
+        audio_data: bytes,
+        sample_rate: int = 16000,
+        num_channels: int = 1
+    ) -> Optional[str]:
         try:
+            # Upload compact 16 kHz mono audio with a real container header
+            upload = encode_for_stt(
+                audio_data,
+                sample_rate,
+                num_channels,
+                audio_format=config.stt_upload_format
+            )
             transcription = await self.client.audio.transcriptions.create(
-                file=("audio.wav", audio_data),
+                file=upload,
                 model=self.model,
                 language="es"
             )
+            trace_mark("stt_done")
             return transcription.text
         except Exception as e:
             logger.error(f"STT transcription error: {e}")
@@ -23,18 +43,19 @@ class GroqSTTService:
 
 class GroqLLMService:
     def __init__(self):
-        self.client = AsyncGroq(api_key=config.groq_api_key)
         self.model = config.groq_llm_model
-        self.conversation_history = []
+        self.transcript = ConversationTranscript(summarizer=self.summarize)
+    
+    @property
+    def client(self) -> AsyncGroq:
+        return provider_clients.groq
         
     async def generate_response(self, user_input: str) -> AsyncGenerator[str, None]:
         try:
-            self.conversation_history.append({"role": "user", "content": user_input})
+            self.transcript.add("user", user_input)
             
-            messages = [
-                {"role": "system", "content": config.system_prompt},
-                *self.conversation_history
-            ]
+            # Bounded prompt: system prompt + rolling summary + recent turns within the token budget
+            messages = self.transcript.prompt(config.system_prompt)
             
             stream = await self.client.chat.completions.create(
                 model=self.model,
@@ -45,17 +66,61 @@ class GroqLLMService:
             )
             
             full_response = ""
-            async for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    content = chunk.choices[0].delta.content
-                    full_response += content
-                    yield content
+            try:
+                async for chunk in stream:
+                    if chunk.choices[0].delta.content:
+                        trace_mark("llm_first_token")
+                        content = chunk.choices[0].delta.content
+                        full_response += content
+                        yield content
+            finally:
+                # Release the HTTP stream right away when the turn is cancelled
+                await stream.close()
+            trace_mark("llm_done")
             
-            self.conversation_history.append({"role": "assistant", "content": full_response})
+            self.transcript.add("assistant", full_response)
+            self.transcript.maybe_fold()
             
         except Exception as e:
+            # Callers speak their own canned reply as one phrase
             logger.error(f"LLM generation error: {e}")
-            yield "Disculpa, hubo un problema técnico. ¿Puedes repetir?"
+            raise
+    
+    async def summarize(self, previous_summary: str, messages: List[Dict[str, str]]) -> str:
+        """Fold older turns into the rolling summary with a small, fast model"""
+        lines = [f"{'Cliente' if m['role'] == 'user' else 'Laura'}: {m['content']}" for m in messages]
+        if previous_summary:
+            lines.insert(0, f"Resumen previo: {previous_summary}")
+        
+        completion = await self.client.chat.completions.create(
+            model=config.groq_summary_model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": f"Resume la llamada de ventas en español en máximo {config.history_summary_words} palabras. "
+                               "Conserva datos del cliente, dolores identificados, objeciones y acuerdos."
+                },
+                {"role": "user", "content": "\n".join(lines)}
+            ],
+            temperature=0.2,
+            max_tokens=config.history_summary_words * 2
+        )
+        return completion.choices[0].message.content or ""
+    
+    def history_checkpoint(self) -> int:
+        return self.transcript.checkpoint()
+    
+    def rollback(self, checkpoint: int):
+        """Forget everything recorded after a checkpoint (e.g. a discarded speculative turn)"""
+        self.transcript.rollback(checkpoint)
+    
+    def truncate_last_response(self, spoken_text: str):
+        """Replace the last assistant reply with the part the caller actually heard"""
+        last = self.transcript.last()
+        if last is not None and last["role"] == "assistant":
+            self.transcript.pop()
+        if spoken_text:
+            self.transcript.add("assistant", spoken_text)
     
     def clear_history(self):
-        self.conversation_history = []
\ No newline at end of file
+        self.transcript.reset()
\ No newline at end of file
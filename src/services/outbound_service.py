@@ -1,65 +1,151 @@
 import asyncio
-from typing import Optional
+from typing import Dict, Optional
 from livekit import api
 from loguru import logger
 from utils.config import config
+from .call_registry import CallRecord, CallRegistry, call_registry
+
+# SIP participant callStatus attribute -> registry state
+SIP_CALL_STATES = {"ringing": "ringing", "active": "answered", "hangup": "ended"}
 
 class OutboundCallService:
-    def __init__(self):
+    def __init__(self, registry: Optional[CallRegistry] = None):
         self.livekit_api = api.LiveKitAPI(
             url=config.livekit_url,
             api_key=config.livekit_api_key,
             api_secret=config.livekit_api_secret
         )
-    
+        self.registry = registry or call_registry
+        self._watchers: Dict[str, asyncio.Task] = {}
+        # Answered calls followed by the shared status sweep
+        self._answered: Dict[str, CallRecord] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+
     async def initiate_call(self, to_number: str, agent_name: str = None) -> Optional[str]:
+        try:
+            record = await self.dial(to_number, agent_name)
+            return record.room_name
+        except Exception as e:
+            logger.error(f"Failed to initiate outbound call to {to_number}: {e}")
+            return None
+
+    async def dial(
+        self,
+        to_number: str,
+        agent_name: str = None,
+        trunk_id: Optional[str] = None,
+        campaign_id: Optional[str] = None
+    ) -> CallRecord:
+        """Create the room and the outbound SIP participant; raises on failure so callers can retry"""
         if agent_name is None:
             agent_name = config.agent_name
-            
+        if trunk_id is None:
+            trunk_id = config.outbound_trunk_id
+
+        record = self.registry.create(to_number, trunk_id, agent_name, campaign_id)
+        room_name = record.room_name
+
         try:
-            room_name = f"call-{to_number.replace('+', '').replace(' ', '')}"
-            
-            room_info = await self.livekit_api.room.create_room(
+            await self.livekit_api.room.create_room(
                 api.CreateRoomRequest(
                     name=room_name,
                     empty_timeout=300,
                     max_participants=2
                 )
             )
-            
-            logger.info(f"Created room {room_name} for outbound call to {to_number}")
-            
-            sip_request = api.CreateSIPTrunkRequest(
-                trunk_id=config.outbound_trunk_id,
-                name=f"outbound-{room_name}",
-                metadata=f"outbound_call_to_{to_number}",
-                numbers=[to_number]
-            )
-            
-            await self.livekit_api.sip.create_sip_participant(
-                api.CreateSIPParticipantRequest(
-                    sip_trunk_id=config.outbound_trunk_id,
-                    sip_call_to=to_number,
-                    room_name=room_name,
-                    participant_identity=f"caller-{to_number}",
-                    participant_metadata=f"outbound_call"
+        except Exception as e:
+            self.registry.transition(record.call_id, "ended", reason=f"dial failed: {e}", code=getattr(e, "code", None))
+            raise
+
+        logger.info(f"Created room {room_name} for outbound call to {to_number}")
+
+        self._watchers[record.call_id] = asyncio.create_task(self._place_call(record, trunk_id))
+
+        logger.info(f"Initiated outbound call {record.call_id} to {to_number} in room {room_name}")
+        return record
+
+    async def _place_call(self, record: CallRecord, trunk_id: str):
+        """Dial and wait for the answer; busy, no-answer and SIP errors end the call with their status"""
+        try:
+            # The INVITE goes out with this request; the answer (or SIP error) is what it waits for
+            self.registry.transition(record.call_id, "ringing")
+            try:
+                await self.livekit_api.sip.create_sip_participant(
+                    api.CreateSIPParticipantRequest(
+                        sip_trunk_id=trunk_id,
+                        sip_call_to=record.phone_number,
+                        room_name=record.room_name,
+                        participant_identity=record.participant_identity,
+                        participant_metadata="outbound_call",
+                        wait_until_answered=True
+                    )
                 )
+            except Exception as e:
+                metadata = getattr(e, "metadata", None) or {}
+                sip_code = metadata.get("sip_status_code")
+                if sip_code:
+                    reason = f"sip {sip_code} {metadata.get('sip_status', '')}".strip()
+                    self.registry.transition(record.call_id, "ended", reason=reason, code=str(sip_code))
+                else:
+                    self.registry.transition(record.call_id, "ended", reason=f"dial failed: {e}", code=getattr(e, "code", None))
+                return
+
+            if self.registry.transition(record.call_id, "answered"):
+                self._answered[record.call_id] = record
+                if self._sweeper is None or self._sweeper.done():
+                    self._sweeper = asyncio.create_task(self._sweep_calls())
+        finally:
+            self._watchers.pop(record.call_id, None)
+
+    async def _sweep_calls(self):
+        """Follow every answered call from one task, reading all rooms' participants once per interval"""
+        while self._answered:
+            await asyncio.sleep(config.call_status_poll_secs)
+            for call_id in [call_id for call_id, record in self._answered.items() if record.state == "ended"]:
+                del self._answered[call_id]
+            await asyncio.gather(*(self._check_call(record) for record in list(self._answered.values())))
+
+    async def _check_call(self, record: CallRecord):
+        try:
+            response = await self.livekit_api.room.list_participants(
+                api.ListParticipantsRequest(room=record.room_name)
             )
-            
-            logger.info(f"Initiated outbound call to {to_number} in room {room_name}")
-            return room_name
-            
         except Exception as e:
-            logger.error(f"Failed to initiate outbound call to {to_number}: {e}")
-            return None
-    
+            if getattr(e, "code", None) == "not_found":
+                self.registry.transition(record.call_id, "ended", reason="room closed")
+                self._answered.pop(record.call_id, None)
+            else:
+                logger.debug(f"Call status check for {record.call_id} failed: {e}")
+            return
+
+        participant = next((p for p in response.participants if p.identity == record.participant_identity), None)
+        if participant is None:
+            self.registry.transition(record.call_id, "ended", reason="participant left")
+        elif SIP_CALL_STATES.get(participant.attributes.get("sip.callStatus")) == "ended":
+            self.registry.transition(record.call_id, "ended", reason="hangup")
+        if record.state == "ended":
+            self._answered.pop(record.call_id, None)
+
     async def end_call(self, room_name: str) -> bool:
         try:
             await self.livekit_api.room.delete_room(
                 api.DeleteRoomRequest(room=room_name)
             )
+            record = self.registry.by_room(room_name)
+            if record is not None:
+                self.registry.transition(record.call_id, "ended", reason="ended by api", code="cancelled")
+                self._answered.pop(record.call_id, None)
+                watcher = self._watchers.pop(record.call_id, None)
+                if watcher is not None:
+                    watcher.cancel()
             logger.info(f"Ended call and deleted room {room_name}")
             return True
         except Exception as e:
             logger.error(f"Failed to end call {room_name}: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    async def end_call_by_id(self, call_id: str) -> bool:
+        record = self.registry.get(call_id)
+        if record is None:
+            return False
+        return await self.end_call(record.room_name)
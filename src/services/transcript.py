@@ -0,0 +1,110 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+from loguru import logger
+from utils.config import config
+
+Summarizer = Callable[[str, List[Dict[str, str]]], Awaitable[str]]
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) good enough for budgeting"""
+    return len(text) // 4 + 1
+
+class ConversationTranscript:
+    """Per-session transcript: recent turns verbatim, older turns folded into a rolling summary"""
+
+    def __init__(
+        self,
+        summarizer: Optional[Summarizer] = None,
+        keep_messages: Optional[int] = None,
+        token_budget: Optional[int] = None
+    ):
+        self.summarizer = summarizer
+        self.keep_messages = keep_messages if keep_messages is not None else config.history_keep_turns * 2
+        self.token_budget = token_budget if token_budget is not None else config.history_token_budget
+        self.summary = ""
+        self.turns: List[Dict[str, str]] = []
+        # Absolute index of turns[0]; lets checkpoints survive folding
+        self._offset = 0
+        self._fold_task: Optional[asyncio.Task] = None
+        # Checkpoint at which the running fold was started
+        self._fold_checkpoint = 0
+
+    def __len__(self) -> int:
+        return self._offset + len(self.turns)
+
+    def add(self, role: str, content: str):
+        self.turns.append({"role": role, "content": content})
+
+    def last(self) -> Optional[Dict[str, str]]:
+        return self.turns[-1] if self.turns else None
+
+    def pop(self) -> Optional[Dict[str, str]]:
+        return self.turns.pop() if self.turns else None
+
+    def checkpoint(self) -> int:
+        return len(self)
+
+    def rollback(self, checkpoint: int):
+        """Drop messages recorded after a checkpoint (messages already folded are kept)"""
+        # A fold started by a rolled-back turn must not land either
+        if self._fold_task is not None and self._fold_checkpoint > checkpoint:
+            self._fold_task.cancel()
+            self._fold_task = None
+        del self.turns[max(checkpoint - self._offset, 0):]
+
+    def reset(self):
+        if self._fold_task is not None:
+            self._fold_task.cancel()
+            self._fold_task = None
+        self.summary = ""
+        self.turns = []
+        self._offset = 0
+
+    def _tokens(self, messages: List[Dict[str, str]]) -> int:
+        return sum(estimate_tokens(message["content"]) for message in messages)
+
+    def prompt(self, system_prompt: str) -> List[Dict[str, str]]:
+        """Messages for the next request: system prompt, rolling summary and the recent turns within budget"""
+        system = system_prompt
+        if self.summary:
+            system = f"{system_prompt}\n\nResumen de la llamada hasta ahora: {self.summary}"
+
+        recent = self.turns[-self.keep_messages:]
+        # Start on a user message so no assistant reply is sent without the message it answered
+        while len(recent) > 1 and (recent[0]["role"] != "user" or self._tokens(recent) > self.token_budget):
+            recent = recent[1:]
+        return [{"role": "system", "content": system}, *recent]
+
+    def maybe_fold(self):
+        """Fold turns beyond the verbatim window into the summary, in the background"""
+        if self.summarizer is None or self._fold_task is not None:
+            return
+        excess = len(self.turns) - self.keep_messages
+        if excess <= 0 and self._tokens(self.turns) <= self.token_budget:
+            return
+        # Fold up to the start of a user message, so whole exchanges go (with the greeting, which
+        # has no user message before it) and the kept window never opens with an orphan reply
+        count = max(excess, 2)
+        while count < len(self.turns) and self.turns[count]["role"] != "user":
+            count += 1
+        if count >= len(self.turns):
+            return
+        self._fold_checkpoint = len(self)
+        self._fold_task = asyncio.create_task(self._fold(count))
+
+    async def _fold(self, count: int):
+        folded = self.turns[:count]
+        try:
+            summary = await self.summarizer(self.summary, folded)
+            if summary:
+                self.summary = summary.strip()
+                # Only drop messages once they are represented in the summary
+                count = min(count, len(self.turns))
+                del self.turns[:count]
+                self._offset += count
+                logger.debug(f"Folded {count} messages into summary ({estimate_tokens(self.summary)} tokens)")
+        except Exception as e:
+            logger.warning(f"Transcript summarization failed: {e}")
+        finally:
+            if self._fold_task is asyncio.current_task():
+                self._fold_task = None
@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Union
+from loguru import logger
+from utils.config import config
+
+PCMData = Union[bytes, memoryview]
+
+def normalize_phrase(text: str) -> str:
+    """Normalize text so trivially different spellings of a phrase share one cache entry"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+class TTSPhraseCache:
+    """Two-tier cache of synthesized PCM: an in-memory LRU over memory-mapped files on disk"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_memory_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or config.tts_cache_dir
+        self.max_memory_bytes = max_memory_bytes if max_memory_bytes is not None else config.tts_cache_memory_mb * 1024 * 1024
+        self._memory: "OrderedDict[str, PCMData]" = OrderedDict()
+        self._memory_bytes = 0
+        self._maps = {}
+
+    def key(self, text: str, voice_id: str, model: str, settings: dict, audio_format: str) -> str:
+        payload = json.dumps(
+            [voice_id, model, settings, audio_format, normalize_phrase(text)],
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pcm")
+
+    def get(self, key: str) -> Optional[PCMData]:
+        pcm = self._memory.get(key)
+        if pcm is not None:
+            self._memory.move_to_end(key)
+            return pcm
+
+        pcm = self._load(key)
+        if pcm is not None:
+            self._remember(key, pcm)
+        return pcm
+
+    def _load(self, key: str) -> Optional[memoryview]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[key] = mapped
+            return memoryview(mapped)
+        except OSError as e:
+            logger.warning(f"Failed to load cached TTS phrase {key[:12]}: {e}")
+            return None
+
+    def _remember(self, key: str, pcm: PCMData):
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = pcm
+        self._memory_bytes += len(pcm)
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            evicted_key, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            # Drop the Python-side mapping; the file stays on disk for the next lookup
+            self._maps.pop(evicted_key, None)
+
+    async def put(self, key: str, pcm: bytes):
+        self._remember(key, pcm)
+        try:
+            await asyncio.to_thread(self._write, key, pcm)
+        except OSError as e:
+            logger.warning(f"Failed to persist TTS phrase {key[:12]}: {e}")
+
+    def _write(self, key: str, pcm: bytes):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(pcm)
+        os.replace(tmp_path, path)
+
+tts_cache = TTSPhraseCache()
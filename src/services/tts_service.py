@@ -1,16 +1,54 @@
 import asyncio
-from typing import AsyncGenerator, Optional
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncGenerator, AsyncIterator, Callable, Deque, Dict, List, Optional
+import numpy as np
 from elevenlabs.client import AsyncElevenLabs
 from elevenlabs import Voice, VoiceSettings
 import openai
 from loguru import logger
+from services.clients import provider_clients
+from services.tts_cache import normalize_phrase, tts_cache
+from utils.audio import StreamingMP3Decoder
 from utils.config import config
+from utils.tracing import trace_mark
+
+TTS_SAMPLE_RATE = 24000
+# 100 ms of 24 kHz mono int16 per chunk when replaying cached audio
+CACHE_CHUNK_BYTES = TTS_SAMPLE_RATE // 10 * 2
+
+@dataclass
+class AudioChunk:
+    """A piece of synthesized audio together with the format it is encoded in"""
+    data: bytes
+    sample_rate: int = TTS_SAMPLE_RATE
+    num_channels: int = 1
+    encoding: str = "pcm_s16le"
+    provider: str = ""
+
+_STREAM_END = object()
+
+class FirstByteTracker:
+    """Recent first-audio latency per provider, used to adapt the hedging deadline"""
+    
+    def __init__(self, window: Optional[int] = None):
+        self.window = window if window is not None else config.tts_hedge_window
+        self.samples: Dict[str, Deque[float]] = {}
+    
+    def record(self, provider: str, seconds: float):
+        self.samples.setdefault(provider, deque(maxlen=self.window)).append(seconds)
+    
+    def deadline(self, provider: str) -> float:
+        samples = self.samples.get(provider)
+        if not samples:
+            return config.tts_hedge_deadline_secs
+        recent = float(np.percentile(samples, config.tts_hedge_percentile))
+        return min(max(recent, config.tts_hedge_min_deadline_secs), config.tts_hedge_max_deadline_secs)
+
+first_byte_latency = FirstByteTracker()
 
 class UltraFastTTSService:
     def __init__(self):
-        self.elevenlabs_client = AsyncElevenLabs(api_key=config.elevenlabs_api_key)
-        self.openai_client = openai.AsyncOpenAI(api_key=config.openai_api_key)
-        
         self.elevenlabs_voice = Voice(
             voice_id=config.elevenlabs_voice_id,
             settings=VoiceSettings(
@@ -20,8 +58,91 @@ class UltraFastTTSService:
                 use_speaker_boost=config.elevenlabs_use_speaker_boost
             )
         )
+        self.cacheable_phrases = {normalize_phrase(phrase) for phrase in [config.greeting_text, *config.tts_cache_phrases]}
+    
+    @property
+    def elevenlabs_client(self) -> AsyncElevenLabs:
+        return provider_clients.elevenlabs
+    
+    @property
+    def openai_client(self) -> openai.AsyncOpenAI:
+        return provider_clients.openai
+        
+    def _cache_key(self, text: str) -> str:
+        return tts_cache.key(
+            text,
+            voice_id=config.elevenlabs_voice_id,
+            model=config.elevenlabs_model,
+            settings=self.elevenlabs_voice.settings.dict(),
+            audio_format=f"pcm_{TTS_SAMPLE_RATE}"
+        )
+    
+    async def synthesize_speech(self, text: str, use_streaming: bool = True) -> AsyncGenerator[AudioChunk, None]:
+        async for chunk in self._synthesize_cached(text, use_streaming):
+            trace_mark("tts_first_byte")
+            yield chunk
+    
+    async def _synthesize_cached(self, text: str, use_streaming: bool = True) -> AsyncGenerator[AudioChunk, None]:
+        if not config.tts_cache_enabled:
+            async for chunk in self._synthesize_uncached(text, use_streaming):
+                yield chunk
+            return
+        
+        cache_key = self._cache_key(text)
+        cached = tts_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"TTS cache hit: {text[:40]}")
+            for start in range(0, len(cached), CACHE_CHUNK_BYTES):
+                yield AudioChunk(data=cached[start:start + CACHE_CHUNK_BYTES], provider="cache")
+            return
+        
+        if normalize_phrase(text) not in self.cacheable_phrases:
+            async for chunk in self._synthesize_uncached(text, use_streaming):
+                yield chunk
+            return
+        
+        collected = []
+        cacheable = True
+        async for chunk in self._synthesize_uncached(text, use_streaming):
+            # Only the configured ElevenLabs voice may be replayed under this key
+            cacheable = cacheable and chunk.provider == "elevenlabs"
+            collected.append(chunk.data)
+            yield chunk
+        if cacheable and collected:
+            await tts_cache.put(cache_key, b"".join(collected))
+    
+    def add_cacheable_phrases(self, phrases: List[str]):
+        """Let extra fixed replies (e.g. intent templates) be cached like the configured phrases"""
+        self.cacheable_phrases.update(normalize_phrase(phrase) for phrase in phrases)
+    
+    def preload_cache(self) -> int:
+        """Load already-cached phrases from disk into the memory tier; returns how many were found"""
+        if not config.tts_cache_enabled:
+            return 0
+        return sum(1 for phrase in self.cacheable_phrases if tts_cache.get(self._cache_key(phrase)) is not None)
+    
+    async def warm_cache(self):
+        """Synthesize any configured phrase that is not cached yet, a bounded number at a time"""
+        missing = [phrase for phrase in self.cacheable_phrases if tts_cache.get(self._cache_key(phrase)) is None]
+        slots = asyncio.Semaphore(max(config.tts_cache_warm_concurrency, 1))
+        
+        async def warm(phrase: str):
+            async with slots:
+                try:
+                    async for _ in self.synthesize_speech(phrase):
+                        pass
+                except Exception as e:
+                    logger.warning(f"Failed to pre-synthesize \"{phrase[:40]}\": {e}")
+        
+        await asyncio.gather(*(warm(phrase) for phrase in missing))
+        logger.info(f"TTS phrase cache warm ({len(self.cacheable_phrases)} phrases, {len(missing)} synthesized)")
+    
+    async def _synthesize_uncached(self, text: str, use_streaming: bool = True) -> AsyncGenerator[AudioChunk, None]:
+        if config.tts_hedge_enabled:
+            async for chunk in self._hedged_synthesis(text, use_streaming):
+                yield chunk
+            return
         
-    async def synthesize_speech(self, text: str, use_streaming: bool = True) -> AsyncGenerator[bytes, None]:
         try:
             async for chunk in self._elevenlabs_synthesis(text, use_streaming):
                 yield chunk
@@ -34,34 +155,188 @@ class UltraFastTTSService:
                 logger.error(f"Both TTS services failed: {fallback_error}")
                 return
     
-    async def _elevenlabs_synthesis(self, text: str, use_streaming: bool = True) -> AsyncGenerator[bytes, None]:
+    async def _hedged_synthesis(self, text: str, use_streaming: bool = True) -> AsyncGenerator[AudioChunk, None]:
+        """Start OpenAI if ElevenLabs has no audio by the deadline; keep whichever streams first"""
+        loop = asyncio.get_running_loop()
+        sources = {
+            "elevenlabs": lambda: self._elevenlabs_synthesis(text, use_streaming),
+            "openai": lambda: self._openai_synthesis(text)
+        }
+        queues: Dict[str, asyncio.Queue] = {}
+        pumps: Dict[str, asyncio.Task] = {}
+        heads: Dict[str, asyncio.Future] = {}
+        started: Dict[str, float] = {}
+        
+        async def pump(source: AsyncIterator[AudioChunk], queue: asyncio.Queue):
+            try:
+                async for chunk in source:
+                    queue.put_nowait(chunk)
+                queue.put_nowait(_STREAM_END)
+            except Exception as e:
+                queue.put_nowait(e)
+        
+        def start(provider: str):
+            queues[provider] = asyncio.Queue()
+            started[provider] = loop.time()
+            pumps[provider] = asyncio.create_task(pump(sources[provider](), queues[provider]))
+            heads[provider] = asyncio.ensure_future(queues[provider].get())
+        
+        start("elevenlabs")
+        deadline = first_byte_latency.deadline("elevenlabs")
+        winner = None
+        first_chunk = None
+        try:
+            while winner is None and heads:
+                hedged = "openai" in queues
+                done, _ = await asyncio.wait(
+                    heads.values(),
+                    timeout=None if hedged else deadline,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    logger.info(f"ElevenLabs first byte over {deadline:.2f}s, hedging with OpenAI")
+                    start("openai")
+                    continue
+                
+                for provider, head in list(heads.items()):
+                    if head not in done:
+                        continue
+                    del heads[provider]
+                    item = head.result()
+                    if isinstance(item, AudioChunk):
+                        winner, first_chunk = provider, item
+                        break
+                    reason = item if isinstance(item, Exception) else "no audio"
+                    logger.warning(f"{provider} TTS failed before first audio: {reason}")
+                    if "openai" not in queues:
+                        start("openai")
+            
+            if winner is None:
+                logger.error("Both TTS services failed")
+                return
+            
+            now = loop.time()
+            first_byte_latency.record(winner, now - started[winner])
+            for provider, task in pumps.items():
+                if provider != winner:
+                    # The loser took at least this long; keep it in the window so the deadline adapts
+                    if not task.done():
+                        first_byte_latency.record(provider, now - started[provider])
+                    task.cancel()
+            
+            yield first_chunk
+            while True:
+                item = await queues[winner].get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, Exception):
+                    logger.error(f"{winner} TTS failed mid-stream: {item}")
+                    break
+                yield item
+        finally:
+            for head in heads.values():
+                head.cancel()
+            for task in pumps.values():
+                task.cancel()
+    
+    async def synthesize_segments(
+        self,
+        segments: AsyncIterator[str],
+        on_segment_done: Optional[Callable[[str], None]] = None
+    ) -> AsyncGenerator[AudioChunk, None]:
+        """Synthesize text segments as they arrive, overlapping requests but yielding audio in order.
+        
+        on_segment_done is called once the consumer has taken every chunk of a segment."""
+        order: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(config.tts_max_parallel_segments)
+        tasks = []
+        
+        async def run_segment(text: str, output: asyncio.Queue):
+            try:
+                async with semaphore:
+                    async for chunk in self.synthesize_speech(text):
+                        await output.put(chunk)
+            finally:
+                await output.put(None)
+        
+        async def produce():
+            try:
+                async for segment in segments:
+                    output: asyncio.Queue = asyncio.Queue()
+                    tasks.append(asyncio.create_task(run_segment(segment, output)))
+                    await order.put((segment, output))
+            finally:
+                await order.put(None)
+        
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                item = await order.get()
+                if item is None:
+                    break
+                segment, output = item
+                while True:
+                    chunk = await output.get()
+                    if chunk is None:
+                        break
+                    yield chunk
+                if on_segment_done is not None:
+                    on_segment_done(segment)
+            # Surface errors raised by the upstream text stream
+            await producer
+        finally:
+            producer.cancel()
+            for task in tasks:
+                task.cancel()
+    
+    async def _elevenlabs_synthesis(self, text: str, use_streaming: bool = True) -> AsyncGenerator[AudioChunk, None]:
+        pcm_output = config.tts_output_format == "pcm"
+        output_format = f"pcm_{TTS_SAMPLE_RATE}" if pcm_output else "mp3_22050_32"
+        
         if use_streaming:
             audio_stream = await self.elevenlabs_client.generate(
                 text=text,
                 voice=self.elevenlabs_voice,
                 model=config.elevenlabs_model,
                 stream=True,
-                optimize_streaming_latency=config.elevenlabs_optimize_streaming_latency
+                optimize_streaming_latency=config.elevenlabs_optimize_streaming_latency,
+                output_format=output_format
             )
-            
-            async for chunk in audio_stream:
-                if chunk:
-                    yield chunk
         else:
-            audio = await self.elevenlabs_client.generate(
+            audio_stream = await self.elevenlabs_client.generate(
                 text=text,
                 voice=self.elevenlabs_voice,
-                model=config.elevenlabs_model
+                model=config.elevenlabs_model,
+                output_format=output_format
             )
-            yield audio
+        
+        async for chunk in self._as_pcm(self._iter_audio(audio_stream), compressed=not pcm_output, provider="elevenlabs"):
+            yield chunk
     
-    async def _openai_synthesis(self, text: str) -> AsyncGenerator[bytes, None]:
-        response = await self.openai_client.audio.speech.create(
+    async def _openai_synthesis(self, text: str) -> AsyncGenerator[AudioChunk, None]:
+        pcm_output = config.tts_output_format == "pcm"
+        
+        # OpenAI "pcm" is raw 24 kHz 16-bit mono; the streaming response yields it as it arrives
+        async with self.openai_client.audio.speech.with_streaming_response.create(
             model=config.openai_tts_model,
             voice=config.openai_tts_voice,
             input=text,
-            response_format="mp3"
-        )
-        
-        async for chunk in response.iter_bytes():
-            yield chunk
\ No newline at end of file
+            response_format="pcm" if pcm_output else "mp3"
+        ) as response:
+            async for chunk in self._as_pcm(response.iter_bytes(), compressed=not pcm_output, provider="openai"):
+                yield chunk
+    
+    async def _iter_audio(self, audio) -> AsyncGenerator[bytes, None]:
+        if isinstance(audio, bytes):
+            yield audio
+            return
+        async for chunk in audio:
+            if chunk:
+                yield chunk
+    
+    async def _as_pcm(self, raw: AsyncIterator[bytes], compressed: bool, provider: str) -> AsyncGenerator[AudioChunk, None]:
+        """Pass raw PCM through untouched; decode compressed audio incrementally"""
+        if compressed:
+            raw = StreamingMP3Decoder(TTS_SAMPLE_RATE).decode(raw)
+        async for data in raw:
+            yield AudioChunk(data=data, provider=provider)
@@ -0,0 +1,36 @@
+"""
+X-Twilio-Signature validation for the Twilio webhooks.
+
+Twilio signs the full URL it requested plus the POST parameters with the
+account's auth token. Behind a proxy the URL the app sees differs from the
+public one, so TWILIO_WEBHOOK_BASE_URL can name the public scheme and host.
+"""
+
+import logging
+import os
+from typing import Dict, Optional
+
+from twilio.request_validator import RequestValidator
+
+logger = logging.getLogger(__name__)
+
+class TwilioSignatureValidator:
+    def __init__(self, auth_token: Optional[str] = None, base_url: Optional[str] = None):
+        auth_token = auth_token or os.getenv('TWILIO_AUTH_TOKEN')
+        self.base_url = (base_url or os.getenv('TWILIO_WEBHOOK_BASE_URL', '')).rstrip('/')
+        self.enabled = os.getenv('TWILIO_VALIDATE_SIGNATURE', 'true').lower() != 'false'
+        self._validator = RequestValidator(auth_token) if auth_token else None
+        if self.enabled and self._validator is None:
+            logger.error("TWILIO_AUTH_TOKEN is not set; Twilio status callbacks will be rejected")
+
+    def public_url(self, url: str, path: str, query: str) -> str:
+        if not self.base_url:
+            return url
+        return f"{self.base_url}{path}" + (f"?{query}" if query else "")
+
+    def valid(self, url: str, path: str, query: str, params: Dict[str, str], signature: Optional[str]) -> bool:
+        if not self.enabled:
+            return True
+        if self._validator is None or not signature:
+            return False
+        return self._validator.validate(self.public_url(url, path, query), params, signature)
@@ -0,0 +1,166 @@
+import asyncio
+import io
+import struct
+from typing import AsyncGenerator, AsyncIterator, Tuple
+import numpy as np
+from loguru import logger
+
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
+
+STT_SAMPLE_RATE = 16000
+# Windowed-sinc low-pass length for non-integer downsampling
+LOWPASS_TAPS = 63
+
+def to_mono(samples: np.ndarray, num_channels: int) -> np.ndarray:
+    """Downmix interleaved int16 samples to mono"""
+    if num_channels == 1:
+        return samples
+    frames = samples[:samples.size - samples.size % num_channels].reshape(-1, num_channels)
+    return frames.mean(axis=1, dtype=np.float32).astype(np.int16)
+
+def lowpass_kernel(cutoff: float, taps: int = LOWPASS_TAPS) -> np.ndarray:
+    """Hamming-windowed sinc FIR with unity DC gain; cutoff is in cycles per sample (below 0.5)"""
+    n = np.arange(taps) - (taps - 1) / 2
+    kernel = np.sinc(2 * cutoff * n) * np.hamming(taps)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int = STT_SAMPLE_RATE) -> np.ndarray:
+    """Resample mono int16 samples; integer ratios use box-filtered decimation, others
+    are low-passed below the target Nyquist frequency before linear interpolation"""
+    if from_rate == to_rate or samples.size == 0:
+        return samples
+    if from_rate > to_rate and from_rate % to_rate == 0:
+        factor = from_rate // to_rate
+        usable = samples.size - samples.size % factor
+        return samples[:usable].reshape(-1, factor).mean(axis=1, dtype=np.float32).astype(np.int16)
+    signal = samples.astype(np.float32)
+    if from_rate > to_rate:
+        # Interpolation alone folds everything above the new Nyquist frequency back into the band
+        signal = np.convolve(signal, lowpass_kernel(0.45 * to_rate / from_rate), mode="same")
+    target_size = int(round(samples.size * to_rate / from_rate))
+    positions = np.linspace(0, samples.size - 1, target_size, dtype=np.float64)
+    resampled = np.interp(positions, np.arange(samples.size), signal)
+    return np.clip(resampled, -32768, 32767).astype(np.int16)
+
+def wav_header(num_samples: int, sample_rate: int = STT_SAMPLE_RATE, num_channels: int = 1) -> bytes:
+    """Build a 44-byte RIFF/WAVE header for 16-bit PCM"""
+    data_size = num_samples * num_channels * 2
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, num_channels, sample_rate,
+        sample_rate * num_channels * 2, num_channels * 2, 16,
+        b"data", data_size
+    )
+
+class WavPayload(io.RawIOBase):
+    """Readable WAV file that streams the header and the sample buffer without concatenating them"""
+
+    def __init__(self, samples: np.ndarray, sample_rate: int = STT_SAMPLE_RATE, num_channels: int = 1):
+        self._parts = [memoryview(wav_header(samples.size // num_channels, sample_rate, num_channels)),
+                       memoryview(np.ascontiguousarray(samples, dtype=np.int16)).cast("B")]
+        self._length = sum(part.nbytes for part in self._parts)
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._length
+        self._position = max(0, min(offset, self._length))
+        return self._position
+
+    def readinto(self, target) -> int:
+        written = 0
+        target = memoryview(target).cast("B")
+        part_start = 0
+        for part in self._parts:
+            part_end = part_start + part.nbytes
+            if self._position < part_end and written < target.nbytes:
+                begin = self._position - part_start
+                count = min(part.nbytes - begin, target.nbytes - written)
+                target[written:written + count] = part[begin:begin + count]
+                written += count
+                self._position += count
+            part_start = part_end
+        return written
+
+def encode_for_stt(
+    pcm: bytes,
+    sample_rate: int,
+    num_channels: int = 1,
+    audio_format: str = "wav"
+) -> Tuple[str, io.IOBase]:
+    """Downmix, resample to 16 kHz and wrap as an upload file.
+
+    Utterances already span only the speech plus its pre/post-roll, so there is
+    nothing left to trim here.
+    """
+    samples = to_mono(np.frombuffer(pcm, dtype=np.int16), num_channels)
+
+    samples = resample(samples, sample_rate, STT_SAMPLE_RATE)
+
+    if audio_format == "flac":
+        if soundfile is not None:
+            encoded = io.BytesIO()
+            soundfile.write(encoded, samples, STT_SAMPLE_RATE, format="FLAC", subtype="PCM_16")
+            encoded.seek(0)
+            return "audio.flac", encoded
+        logger.warning("soundfile is not installed, falling back to WAV for STT upload")
+
+    return "audio.wav", WavPayload(samples, STT_SAMPLE_RATE)
+
+class StreamingMP3Decoder:
+    """Incrementally decode compressed TTS audio to int16 PCM through an ffmpeg pipe"""
+
+    def __init__(self, sample_rate: int, num_channels: int = 1, input_format: str = "mp3", read_size: int = 4096):
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.input_format = input_format
+        self.read_size = read_size
+
+    async def decode(self, chunks: AsyncIterator[bytes]) -> AsyncGenerator[bytes, None]:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-loglevel", "error",
+            "-f", self.input_format, "-i", "pipe:0",
+            "-f", "s16le", "-ac", str(self.num_channels), "-ar", str(self.sample_rate),
+            "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE
+        )
+
+        async def feed():
+            try:
+                async for chunk in chunks:
+                    process.stdin.write(chunk)
+                    # Pipe buffers bound memory: wait for ffmpeg to consume before reading more
+                    await process.stdin.drain()
+            finally:
+                if not process.stdin.is_closing():
+                    process.stdin.close()
+
+        feeder = asyncio.create_task(feed())
+        try:
+            while True:
+                pcm = await process.stdout.read(self.read_size)
+                if not pcm:
+                    break
+                yield pcm
+            await feeder
+        finally:
+            feeder.cancel()
+            if process.returncode is None:
+                process.kill()
+            await process.wait()
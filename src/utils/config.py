@@ -1,11 +1,16 @@
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
 load_dotenv()
 
+LAURA_GREETING = "¡Hola! Soy Laura de TDX. Ayudo a líderes empresariales con retos tecnológicos como atención lenta, sobrecarga operativa y necesidad de innovar rápido. ¿Alguno de estos temas resuena contigo?"
+# Canned replies are spoken whole, never through the phrase segmenter, so they replay from the TTS cache
+REPEAT_REPLY = "Disculpa, ¿podrías repetir eso?"
+TECHNICAL_ERROR_REPLY = "Disculpa, tuve un problema técnico. ¿Podrías repetir tu pregunta?"
+
 class Config(BaseSettings):
     # LiveKit Configuration
     livekit_url: str = Field(default="wss://forceapp-jaadrt7a.livekit.cloud", env="LIVEKIT_URL")
@@ -17,8 +22,25 @@ class Config(BaseSettings):
     inbound_trunk_id: str = Field(default="ST_62xofSEmFyRe", env="INBOUND_TRUNK_ID")
     sip_uri: str = Field(default="6jf4gz4gbna.sip.livekit.cloud", env="SIP_URI")
     
+    # Outbound campaigns (CAMPAIGN_TRUNK_RATES overrides calls/sec per trunk, as JSON)
+    campaign_max_concurrent_calls: int = Field(default=10, env="CAMPAIGN_MAX_CONCURRENT_CALLS")
+    campaign_calls_per_second: float = Field(default=1.0, env="CAMPAIGN_CALLS_PER_SECOND")
+    campaign_trunk_rates: Dict[str, float] = Field(default={}, env="CAMPAIGN_TRUNK_RATES")
+    campaign_burst: int = Field(default=3, env="CAMPAIGN_BURST")
+    campaign_max_attempts: int = Field(default=3, env="CAMPAIGN_MAX_ATTEMPTS")
+    campaign_retry_base_secs: float = Field(default=5.0, env="CAMPAIGN_RETRY_BASE_SECS")
+    campaign_retry_max_secs: float = Field(default=60.0, env="CAMPAIGN_RETRY_MAX_SECS")
+    
+    # Call registry (one sweep over all answered calls reads each SIP participant's call status)
+    call_status_poll_secs: float = Field(default=5.0, env="CALL_STATUS_POLL_SECS")
+    call_registry_max_ended: int = Field(default=10000, env="CALL_REGISTRY_MAX_ENDED")
+    
     # Agent Configuration
     agent_name: str = Field(default="laura-sdr", env="AGENT_NAME")
+    greeting_text: str = Field(
+        default=LAURA_GREETING,
+        env="GREETING_TEXT"
+    )
     
     # API Keys
     groq_api_key: str = Field(env="GROQ_API_KEY")
@@ -31,6 +53,27 @@ class Config(BaseSettings):
     vad_stop_secs: float = Field(default=0.8, env="VAD_STOP_SECS")
     vad_min_volume: float = Field(default=0.6, env="VAD_MIN_VOLUME")
     
+    # Barge-in: sustained caller speech that cancels the agent's current turn
+    barge_in_min_speech_secs: float = Field(default=0.3, env="BARGE_IN_MIN_SPEECH_SECS")
+    barge_in_cancel_timeout_secs: float = Field(default=0.2, env="BARGE_IN_CANCEL_TIMEOUT_SECS")
+    
+    # Speculative turns: start STT + LLM on a short pause, commit at the real endpoint
+    speculative_enabled: bool = Field(default=True, env="SPECULATIVE_ENABLED")
+    speculative_silence_secs: float = Field(default=0.25, env="SPECULATIVE_SILENCE_SECS")
+    speculative_max_concurrent: int = Field(default=4, env="SPECULATIVE_MAX_CONCURRENT")
+    
+    # Per-turn latency tracing
+    trace_enabled: bool = Field(default=False, env="TRACE_ENABLED")
+    trace_file: str = Field(default="logs/traces.jsonl", env="TRACE_FILE")
+    trace_max_bytes: int = Field(default=10 * 1024 * 1024, env="TRACE_MAX_BYTES")
+    trace_backup_count: int = Field(default=5, env="TRACE_BACKUP_COUNT")
+    
+    # Utterance segmentation (one STT request per utterance)
+    utterance_pre_roll_secs: float = Field(default=0.3, env="UTTERANCE_PRE_ROLL_SECS")
+    utterance_post_roll_secs: float = Field(default=0.2, env="UTTERANCE_POST_ROLL_SECS")
+    utterance_min_speech_secs: float = Field(default=0.15, env="UTTERANCE_MIN_SPEECH_SECS")
+    utterance_max_secs: float = Field(default=30.0, env="UTTERANCE_MAX_SECS")
+    
     # TTS Configuration (IDENTICAL to Pipecat)
     elevenlabs_voice_id: str = Field(default="qHkrJuifPpn95wK3rm2A", env="ELEVENLABS_VOICE_ID")
     elevenlabs_model: str = Field(default="eleven_flash_v2_5", env="ELEVENLABS_MODEL")
@@ -40,14 +83,82 @@ class Config(BaseSettings):
     elevenlabs_use_speaker_boost: bool = Field(default=False, env="ELEVENLABS_USE_SPEAKER_BOOST")
     elevenlabs_optimize_streaming_latency: int = Field(default=4, env="ELEVENLABS_OPTIMIZE_STREAMING_LATENCY")
     
+    # "pcm" streams raw 24 kHz PCM from both providers; "mp3" decodes compressed audio incrementally
+    tts_output_format: str = Field(default="pcm", env="TTS_OUTPUT_FORMAT")
+    
+    # Hedged TTS: start OpenAI when ElevenLabs has no audio by an adaptive first-byte deadline
+    tts_hedge_enabled: bool = Field(default=True, env="TTS_HEDGE_ENABLED")
+    tts_hedge_deadline_secs: float = Field(default=0.8, env="TTS_HEDGE_DEADLINE_SECS")
+    tts_hedge_min_deadline_secs: float = Field(default=0.3, env="TTS_HEDGE_MIN_DEADLINE_SECS")
+    tts_hedge_max_deadline_secs: float = Field(default=1.5, env="TTS_HEDGE_MAX_DEADLINE_SECS")
+    tts_hedge_percentile: float = Field(default=90, env="TTS_HEDGE_PERCENTILE")
+    tts_hedge_window: int = Field(default=50, env="TTS_HEDGE_WINDOW")
+    
+    # TTS phrase cache (greeting and canned replies)
+    tts_cache_enabled: bool = Field(default=True, env="TTS_CACHE_ENABLED")
+    tts_cache_dir: str = Field(default="cache/tts", env="TTS_CACHE_DIR")
+    tts_cache_memory_mb: int = Field(default=64, env="TTS_CACHE_MEMORY_MB")
+    tts_cache_warm_concurrency: int = Field(default=4, env="TTS_CACHE_WARM_CONCURRENCY")
+    tts_cache_phrases: List[str] = Field(
+        default=[
+            LAURA_GREETING,
+            REPEAT_REPLY,
+            TECHNICAL_ERROR_REPLY
+        ],
+        env="TTS_CACHE_PHRASES"
+    )
+    
     # OpenAI TTS Fallback
     openai_tts_voice: str = Field(default="nova", env="OPENAI_TTS_VOICE")
     openai_tts_model: str = Field(default="tts-1", env="OPENAI_TTS_MODEL")
     openai_tts_language: str = Field(default="es", env="OPENAI_TTS_LANGUAGE")
     
+    # Sentence-level LLM -> TTS streaming
+    tts_segment_min_chars: int = Field(default=25, env="TTS_SEGMENT_MIN_CHARS")
+    tts_segment_max_chars: int = Field(default=200, env="TTS_SEGMENT_MAX_CHARS")
+    tts_max_parallel_segments: int = Field(default=2, env="TTS_MAX_PARALLEL_SEGMENTS")
+    tts_frame_ms: int = Field(default=20, env="TTS_FRAME_MS")
+    
+    # Shared provider HTTP pools
+    http2_enabled: bool = Field(default=True, env="HTTP2_ENABLED")
+    http_pool_max_connections: int = Field(default=20, env="HTTP_POOL_MAX_CONNECTIONS")
+    http_pool_max_keepalive: int = Field(default=10, env="HTTP_POOL_MAX_KEEPALIVE")
+    http_keepalive_expiry_secs: float = Field(default=60.0, env="HTTP_KEEPALIVE_EXPIRY_SECS")
+    http_timeout_secs: float = Field(default=30.0, env="HTTP_TIMEOUT_SECS")
+    http_connect_timeout_secs: float = Field(default=5.0, env="HTTP_CONNECT_TIMEOUT_SECS")
+    http_warm_on_start: bool = Field(default=True, env="HTTP_WARM_ON_START")
+    http_rewarm_idle_secs: float = Field(default=45.0, env="HTTP_REWARM_IDLE_SECS")
+    
     # Groq Configuration
     groq_stt_model: str = Field(default="whisper-large-v3-turbo", env="GROQ_STT_MODEL")
     groq_llm_model: str = Field(default="llama-3.3-70b-versatile", env="GROQ_LLM_MODEL")
+    groq_summary_model: str = Field(default="llama-3.1-8b-instant", env="GROQ_SUMMARY_MODEL")
+    
+    # Conversation history budget (older turns are folded into a rolling summary)
+    history_keep_turns: int = Field(default=4, env="HISTORY_KEEP_TURNS")
+    history_token_budget: int = Field(default=800, env="HISTORY_TOKEN_BUDGET")
+    history_summary_words: int = Field(default=80, env="HISTORY_SUMMARY_WORDS")
+    stt_upload_format: str = Field(default="wav", env="STT_UPLOAD_FORMAT")
+    
+    # Job admission: the worker stops taking jobs once any limit is reached
+    worker_load_threshold: float = Field(default=0.75, env="WORKER_LOAD_THRESHOLD")
+    worker_max_jobs: int = Field(default=8, env="WORKER_MAX_JOBS")
+    worker_max_cpu_percent: float = Field(default=80.0, env="WORKER_MAX_CPU_PERCENT")
+    
+    # Event-loop monitoring and sampling profiler (PROFILER_SIGNAL toggles it at runtime)
+    loop_monitor_enabled: bool = Field(default=True, env="LOOP_MONITOR_ENABLED")
+    loop_block_threshold_ms: float = Field(default=100.0, env="LOOP_BLOCK_THRESHOLD_MS")
+    profiler_enabled: bool = Field(default=False, env="PROFILER_ENABLED")
+    profiler_signal: Optional[str] = Field(default="SIGUSR2", env="PROFILER_SIGNAL")
+    profiler_interval_ms: float = Field(default=10.0, env="PROFILER_INTERVAL_MS")
+    profiler_duration_secs: float = Field(default=0.0, env="PROFILER_DURATION_SECS")
+    profiler_dir: str = Field(default="logs/profiles", env="PROFILER_DIR")
+    
+    # Fast-path intent router (template replies for predictable turns, no LLM call)
+    intent_router_enabled: bool = Field(default=True, env="INTENT_ROUTER_ENABLED")
+    intent_router_min_confidence: float = Field(default=0.6, env="INTENT_ROUTER_MIN_CONFIDENCE")
+    intent_router_file: Optional[str] = Field(default=None, env="INTENT_ROUTER_FILE")
+    intent_router_cache_audio: bool = Field(default=True, env="INTENT_ROUTER_CACHE_AUDIO")
     
     # Laura SDR System Prompt (IDENTICAL to Pipecat)
     system_prompt: str = Field(
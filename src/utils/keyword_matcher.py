@@ -0,0 +1,55 @@
+import re
+from typing import Dict, Hashable, Iterable, Set
+from utils.text_normalize import normalize_words, strip_accents
+
+class KeywordMatcher:
+    """Every keyword table compiled into one word-bounded pattern, matched in a single pass.
+
+    Keywords and transcripts go through the same accent/case normalization and
+    only whole words match, so "si" never fires inside "sistema". The last word
+    may carry a plural ending ("costo" matches "costos", "reunion" matches
+    "reuniones"); gender and verb forms are listed in the tables themselves.
+    """
+
+    def __init__(self, tables: Dict[Hashable, Iterable[str]]):
+        labels: Dict[str, Set[Hashable]] = {}
+        for label, keywords in tables.items():
+            for keyword in keywords:
+                labels.setdefault(" ".join(normalize_words(keyword)), set()).add(label)
+        labels.pop("", None)
+
+        # The scan never reports a keyword nested inside a longer match, so the longer one carries its labels
+        for keyword, keyword_labels in labels.items():
+            for other, other_labels in labels.items():
+                if other != keyword and f" {other} " in f" {keyword} ":
+                    keyword_labels |= other_labels
+        self._labels = labels
+
+        # Longest first so multi-word keywords win over their own words
+        alternatives = sorted(labels, key=len, reverse=True)
+        self._pattern = re.compile(
+            r"\b(?:" + "|".join(r"\W+".join(map(re.escape, keyword.split())) + _plural(keyword) for keyword in alternatives) + r")\b"
+        )
+
+    def _lookup(self, found: str) -> Set[Hashable]:
+        keyword = " ".join(normalize_words(found))
+        # Exact keyword first, then without the plural ending the pattern allowed
+        for candidate in (keyword, keyword[:-1], keyword[:-2]):
+            keyword_labels = self._labels.get(candidate)
+            if keyword_labels is not None:
+                return keyword_labels
+        return set()
+
+    def match(self, text: str) -> Set[Hashable]:
+        """Labels of every table with at least one keyword in the text"""
+        hits: Set[Hashable] = set()
+        for found in self._pattern.findall(strip_accents(text)):
+            keyword_labels = self._labels.get(found)
+            if keyword_labels is None:
+                keyword_labels = self._lookup(found)
+            hits |= keyword_labels
+        return hits
+
+def _plural(keyword: str) -> str:
+    """Optional Spanish plural ending for the keyword's last word: -s after a vowel, -es otherwise"""
+    return "s?" if keyword[-1] in "aeiou" else "(?:es)?"
@@ -0,0 +1,172 @@
+import asyncio
+import atexit
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import Optional
+from loguru import logger
+from utils.config import config
+
+class LoopLagProbe:
+    """Measures how late the event loop runs a callback that should fire every `interval` seconds"""
+
+    def __init__(self, interval: float = 0.1, smoothing: float = 0.2):
+        self.interval = interval
+        self.smoothing = smoothing
+        self.lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.last_tick = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start probing the running loop; safe to call repeatedly"""
+        if self._task is None or self._task.done():
+            self.last_tick = time.monotonic()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def take_max(self) -> float:
+        """Worst lag since the previous call"""
+        worst, self.max_lag_ms = self.max_lag_ms, self.lag_ms
+        return worst
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_tick = time.monotonic()
+            lag_ms = max(time.perf_counter() - expected, 0.0) * 1000
+            # Smoothed value for load reporting, raw peak for alerts
+            self.lag_ms += self.smoothing * (lag_ms - self.lag_ms)
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+class LoopMonitor(LoopLagProbe):
+    """Lag probe plus a watchdog thread that logs what the loop is running when it stops ticking"""
+
+    def __init__(self, block_threshold_ms: Optional[float] = None, interval: float = 0.05):
+        super().__init__(interval=interval)
+        self.block_threshold = (block_threshold_ms if block_threshold_ms is not None else config.loop_block_threshold_ms) / 1000
+        self._loop_thread_id: Optional[int] = None
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self):
+        super().start()
+        self._loop_thread_id = threading.get_ident()
+        if self._watchdog is None:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    def _watch(self):
+        reported_tick = None
+        while True:
+            time.sleep(self.block_threshold / 2)
+            if self._task is None or self._task.done():
+                continue
+            tick = self.last_tick
+            blocked = time.monotonic() - tick - self.interval
+            # One report per stall: the stack at the moment the threshold is crossed
+            if blocked < self.block_threshold or tick == reported_tick:
+                continue
+            reported_tick = tick
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame, limit=15))
+            logger.warning(f"Event loop blocked for {blocked * 1000:.0f} ms, running:\n{stack}")
+
+class SamplingProfiler:
+    """Samples every thread's stack at a fixed interval and writes collapsed stacks for flamegraphs"""
+
+    def __init__(self, interval_ms: Optional[float] = None, output_dir: Optional[str] = None):
+        self.interval = (interval_ms if interval_ms is not None else config.profiler_interval_ms) / 1000
+        self.output_dir = output_dir or config.profiler_dir
+        self.samples: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._started_at = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self.running:
+            return
+        self.samples = Counter()
+        self._stop.clear()
+        self._started_at = time.time()
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        logger.info(f"Sampling profiler started (every {self.interval * 1000:.0f} ms)")
+
+    def stop(self) -> Optional[str]:
+        """Stop sampling and write the profile; returns its path"""
+        if not self.running:
+            return None
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        return self.write()
+
+    def toggle(self):
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+
+    def _sample(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                if names.get(thread_id) == "loop-watchdog":
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def write(self) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"profile-{os.getpid()}-{int(self._started_at)}.collapsed")
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        logger.info(f"Wrote {sum(self.samples.values())} profile samples to {path}")
+        return path
+
+loop_monitor = LoopMonitor()
+profiler = SamplingProfiler()
+atexit.register(profiler.stop)
+
+def start_diagnostics():
+    """Start loop monitoring and the profiler for this process as configured; safe to call per job"""
+    if config.loop_monitor_enabled:
+        loop_monitor.start()
+
+    loop = asyncio.get_running_loop()
+    if config.profiler_signal:
+        try:
+            loop.add_signal_handler(getattr(signal, config.profiler_signal), profiler.toggle)
+        except (AttributeError, NotImplementedError, RuntimeError, ValueError) as e:
+            logger.debug(f"Profiler signal {config.profiler_signal} unavailable: {e}")
+
+    if config.profiler_enabled and not profiler.running:
+        profiler.start()
+        if config.profiler_duration_secs > 0:
+            loop.call_later(config.profiler_duration_secs, profiler.stop)
@@ -0,0 +1,16 @@
+import os
+import resource
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def rss_mb() -> float:
+    """Current resident memory of this process in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, IndexError, ValueError):
+        # ru_maxrss is a peak, in KB on Linux; good enough where /proc is unavailable
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def memory_report(stage: str) -> str:
+    return f"[pid {os.getpid()}] {stage}: rss={rss_mb():.1f} MB"
@@ -0,0 +1,24 @@
+import re
+import unicodedata
+from typing import List
+
+_WORD = re.compile(r"\w+")
+
+def strip_accents(text: str) -> str:
+    """Lowercase ASCII form of a transcript: "Reunión mañana" -> "reunion manana".
+
+    Diacritics are decomposed and dropped; anything else outside ASCII (¿, ¡,
+    emoji) only ever separates words, so it becomes a space: "sí¿cuándo" ->
+    "si cuando".
+    """
+    return "".join(
+        char if char.isascii() else ("" if unicodedata.combining(char) else " ")
+        for char in unicodedata.normalize("NFKD", text.lower())
+    )
+
+def normalize_words(text: str) -> List[str]:
+    """Accent-free lowercase words of a transcript, punctuation removed"""
+    return _WORD.findall(strip_accents(text))
+
+def normalize_transcript(text: str) -> str:
+    return " ".join(normalize_words(text))
@@ -0,0 +1,59 @@
+from typing import AsyncGenerator, AsyncIterator, List, Optional
+from utils.config import config
+
+SENTENCE_END = ".!?…"
+CLAUSE_END = ",;:"
+
+class SentenceSegmenter:
+    """Incrementally split streamed LLM text into phrases that can be spoken on their own"""
+
+    def __init__(self, min_clause_chars: Optional[int] = None, max_chars: Optional[int] = None):
+        self.min_clause_chars = min_clause_chars if min_clause_chars is not None else config.tts_segment_min_chars
+        self.max_chars = max_chars if max_chars is not None else config.tts_segment_max_chars
+        self._buffer = ""
+
+    def push(self, text: str) -> List[str]:
+        """Add streamed text and return every segment that is now complete"""
+        self._buffer += text
+        segments = []
+        last_cut = 0
+        for i in range(len(self._buffer) - 1):
+            char = self._buffer[i]
+            if not self._buffer[i + 1].isspace():
+                continue
+            length = i + 1 - last_cut
+            if char in SENTENCE_END or (char in CLAUSE_END and length >= self.min_clause_chars):
+                segment = self._buffer[last_cut:i + 1].strip()
+                if segment:
+                    segments.append(segment)
+                last_cut = i + 1
+        start = last_cut
+
+        # Never hold back an overlong run without punctuation
+        while len(self._buffer) - start > self.max_chars:
+            cut = self._buffer.rfind(" ", start, start + self.max_chars)
+            if cut <= start:
+                cut = start + self.max_chars
+            segment = self._buffer[start:cut].strip()
+            if segment:
+                segments.append(segment)
+            start = cut
+
+        self._buffer = self._buffer[start:]
+        return segments
+
+    def flush(self) -> Optional[str]:
+        """Return whatever text is left once the stream has ended"""
+        segment = self._buffer.strip()
+        self._buffer = ""
+        return segment or None
+
+async def segment_text_stream(text_stream: AsyncIterator[str]) -> AsyncGenerator[str, None]:
+    """Turn a stream of LLM tokens into a stream of speakable segments"""
+    segmenter = SentenceSegmenter()
+    async for chunk in text_stream:
+        for segment in segmenter.push(chunk):
+            yield segment
+    tail = segmenter.flush()
+    if tail:
+        yield tail
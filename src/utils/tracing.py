@@ -0,0 +1,94 @@
+import json
+import logging
+import logging.handlers
+import os
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+from utils.config import config
+
+class TurnTrace:
+    """Timestamps of the pipeline stages of one turn, relative to the end of the caller's speech"""
+
+    __slots__ = ("call_id", "turn_id", "speculative", "started_at", "_t0", "marks")
+
+    def __init__(self, call_id: str, turn_id: int, speculative: bool = False):
+        self.call_id = call_id
+        self.turn_id = turn_id
+        self.speculative = speculative
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.marks: Dict[str, float] = {}
+
+    def mark(self, stage: str):
+        """Record a stage; only the first occurrence in a turn counts"""
+        if stage not in self.marks:
+            self.marks[stage] = round((time.perf_counter() - self._t0) * 1000, 1)
+
+    def finish(self, status: str = "ok"):
+        tracer.write(self, status)
+
+class _NullTrace:
+    """Stand-in used when tracing is disabled so call sites stay branch-free"""
+
+    __slots__ = ()
+
+    def mark(self, stage: str):
+        pass
+
+    def finish(self, status: str = "ok"):
+        pass
+
+NULL_TRACE = _NullTrace()
+
+_current_trace: ContextVar = ContextVar("current_trace", default=NULL_TRACE)
+
+def current_trace():
+    return _current_trace.get()
+
+def trace_mark(stage: str):
+    """Mark a stage on the trace of the turn running in the current task, if any"""
+    _current_trace.get().mark(stage)
+
+class Tracer:
+    """Writes one compact JSON line per turn to a size-rotated trace file"""
+
+    def __init__(self):
+        self.enabled = config.trace_enabled
+        self._logger: Optional[logging.Logger] = None
+
+    def start_turn(self, call_id: str, turn_id: int, speculative: bool = False):
+        return TurnTrace(call_id, turn_id, speculative) if self.enabled else NULL_TRACE
+
+    def activate(self, trace):
+        """Make a trace current for the calling task and every task it spawns"""
+        _current_trace.set(trace)
+
+    def _get_logger(self) -> logging.Logger:
+        if self._logger is None:
+            os.makedirs(os.path.dirname(config.trace_file) or ".", exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                config.trace_file,
+                maxBytes=config.trace_max_bytes,
+                backupCount=config.trace_backup_count
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            trace_logger = logging.getLogger("voice_agent.traces")
+            trace_logger.propagate = False
+            trace_logger.setLevel(logging.INFO)
+            trace_logger.addHandler(handler)
+            self._logger = trace_logger
+        return self._logger
+
+    def write(self, trace: TurnTrace, status: str):
+        record = {
+            "call": trace.call_id,
+            "turn": trace.turn_id,
+            "ts": round(trace.started_at, 3),
+            "spec": trace.speculative,
+            "status": status,
+            "ms": trace.marks
+        }
+        self._get_logger().info(json.dumps(record, separators=(",", ":")))
+
+tracer = Tracer()
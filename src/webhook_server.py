@@ -4,16 +4,49 @@ Webhook server for handling Twilio calls and connecting them to LiveKit
 This runs alongside the main voice agent to handle incoming calls
 """
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.responses import Response as FastAPIResponse
+from livekit import api
 import logging
 import os
+from collections import OrderedDict
 from typing import Optional
+from urllib.parse import parse_qsl
+
+from services.call_events import TERMINAL_STATUSES, CallEventStore, RoomCleaner, events_authorized
+from services.twilio_signature import TwilioSignatureValidator
 
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Twilio-LiveKit Webhook Handler")
 
+event_store = CallEventStore()
+signature_validator = TwilioSignatureValidator()
+room_cleaner: Optional[RoomCleaner] = None
+# Room each inbound call was connected to, so its status callbacks clean up the right room
+call_rooms: "OrderedDict[str, str]" = OrderedDict()
+MAX_CALL_ROOMS = 4096
+
+@app.on_event("startup")
+async def start_event_store():
+    global room_cleaner
+    await event_store.start()
+    
+    # Room cleanup needs LiveKit credentials; without them events are still recorded
+    if os.getenv('LIVEKIT_API_KEY') and os.getenv('LIVEKIT_API_SECRET'):
+        livekit_api = api.LiveKitAPI(
+            url=os.getenv('LIVEKIT_URL', 'wss://forceapp-jaadrt7a.livekit.cloud'),
+            api_key=os.getenv('LIVEKIT_API_KEY'),
+            api_secret=os.getenv('LIVEKIT_API_SECRET')
+        )
+        room_cleaner = RoomCleaner(
+            lambda room_name: livekit_api.room.delete_room(api.DeleteRoomRequest(room=room_name))
+        )
+
+@app.on_event("shutdown")
+async def stop_event_store():
+    await event_store.stop()
+
 @app.post("/webhook/twilio")
 async def twilio_webhook(request: Request):
     """Handle incoming Twilio calls"""
@@ -29,6 +62,11 @@ async def twilio_webhook(request: Request):
         # Extract room name from query parameters
         room_name = request.query_params.get('room', f'twilio-call-{call_sid}')
         
+        if call_sid:
+            call_rooms[call_sid] = room_name
+            if len(call_rooms) > MAX_CALL_ROOMS:
+                call_rooms.popitem(last=False)
+        
         logger.info(f"Incoming Twilio call: {call_sid} from {from_number} to {to_number}")
         logger.info(f"Call status: {call_status}, Room: {room_name}")
         
@@ -64,19 +102,47 @@ async def twilio_webhook(request: Request):
 async def twilio_status_webhook(request: Request):
     """Handle Twilio call status updates"""
     try:
-        form_data = await request.form()
+        form_data = dict(parse_qsl((await request.body()).decode('utf-8'), keep_blank_values=True))
+        
+        # This endpoint deletes rooms, so only Twilio may call it
+        signature = request.headers.get('X-Twilio-Signature')
+        if not signature_validator.valid(str(request.url), request.url.path, request.url.query, form_data, signature):
+            logger.warning("Rejected status callback with a missing or invalid Twilio signature")
+            return FastAPIResponse(content="Forbidden", status_code=403, media_type="text/plain")
         
         call_sid = form_data.get('CallSid')
         call_status = form_data.get('CallStatus')
+        # The room comes from the inbound webhook for this call, never from the request
+        room_name = call_rooms.get(call_sid, f'twilio-call-{call_sid}')
         
         logger.info(f"Call status update: {call_sid} -> {call_status}")
         
+        # Persisting and room cleanup both happen off the response path
+        event_store.record(call_sid, call_status, room_name, form_data)
+        if call_sid and call_status in TERMINAL_STATUSES:
+            call_rooms.pop(call_sid, None)
+            if room_cleaner is not None:
+                room_cleaner.schedule(room_name)
+        
         return FastAPIResponse(content="OK", media_type="text/plain")
         
     except Exception as e:
         logger.error(f"Error handling status update: {e}")
         return FastAPIResponse(content="ERROR", media_type="text/plain")
 
+@app.get("/webhook/twilio/events")
+async def call_events(
+    call_sid: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    limit: int = 100,
+    authorization: Optional[str] = Header(None)
+):
+    """Recorded status callbacks, newest first; since/until are unix timestamps"""
+    if not events_authorized(authorization):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return {"dropped": event_store.dropped, "events": await event_store.query(call_sid, since, until, limit)}
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Modules import each other as top-level packages (services, utils, agent), as when run from src/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Settings require provider keys; tests never reach the providers
+for name in ("LIVEKIT_API_KEY", "LIVEKIT_API_SECRET", "GROQ_API_KEY", "ELEVENLABS_API_KEY", "OPENAI_API_KEY"):
+    os.environ.setdefault(name, "test")
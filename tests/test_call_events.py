@@ -0,0 +1,12 @@
+from services.call_events import events_authorized
+
+def test_events_require_the_configured_bearer_token():
+    assert events_authorized("Bearer s3cret", token="s3cret")
+    assert events_authorized("bearer s3cret", token="s3cret")
+    assert not events_authorized("Bearer wrong", token="s3cret")
+    assert not events_authorized("s3cret", token="s3cret")
+    assert not events_authorized(None, token="s3cret")
+
+def test_events_are_closed_without_a_token(monkeypatch):
+    monkeypatch.delenv("CALL_EVENTS_TOKEN", raising=False)
+    assert not events_authorized("Bearer anything")
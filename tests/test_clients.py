@@ -0,0 +1,30 @@
+import asyncio
+
+from services.clients import ProviderClients
+
+def test_aclose_closes_the_loop_pools():
+    clients = ProviderClients()
+
+    async def run():
+        client = clients.http("groq")
+        await clients.aclose()
+        return client
+
+    client = asyncio.run(run())
+    assert client.is_closed
+
+def test_new_loop_closes_clients_of_a_live_previous_loop():
+    clients = ProviderClients()
+    old_loop = asyncio.new_event_loop()
+
+    async def open_client():
+        return clients.http("groq")
+
+    old_client = old_loop.run_until_complete(open_client())
+    # Another loop takes over while the old one is still open
+    new_client = asyncio.run(open_client())
+    old_loop.run_until_complete(asyncio.sleep(0.01))
+    old_loop.close()
+
+    assert old_client.is_closed
+    assert new_client is not old_client
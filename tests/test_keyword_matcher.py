@@ -0,0 +1,21 @@
+from agent.conversation import ConversationManager
+from utils.keyword_matcher import KeywordMatcher
+
+def pain_points(text):
+    return ConversationManager().analyze(text)[1]
+
+def test_inflected_pain_keywords_match():
+    assert pain_points("La atención es muy lenta") == ["atencion_lenta"]
+    assert pain_points("Los tiempos son lentos") == ["atencion_lenta"]
+    assert pain_points("Los clientes esperan mucho") == ["atencion_lenta"]
+    assert pain_points("Siguen esperando respuesta") == ["atencion_lenta"]
+    assert pain_points("Estamos saturadas de pedidos") == ["sobrecarga"]
+    assert pain_points("Me preocupa el costo") == ["costos"]
+    assert pain_points("Me preocupan los costos") == ["costos"]
+    assert pain_points("Tenemos procesos repetitivos") == ["procesos"]
+
+def test_keywords_only_match_whole_words():
+    matcher = KeywordMatcher({"yes": ["si"], "meeting": ["reunion"]})
+    assert matcher.match("Nuestro sistema funciona") == set()
+    assert matcher.match("Sí, claro") == {"yes"}
+    assert matcher.match("Tenemos muchas reuniones") == {"meeting"}
@@ -0,0 +1,75 @@
+import asyncio
+
+from services.tts_service import UltraFastTTSService
+from utils.config import config
+
+class FakeStreamedResponse:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def iter_bytes(self):
+        for chunk in self.chunks:
+            yield chunk
+
+class FakeStreamingSpeech:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.requests = []
+        self.closed = False
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return self
+
+    async def __aenter__(self):
+        return FakeStreamedResponse(self.chunks)
+
+    async def __aexit__(self, *exc):
+        self.closed = True
+
+class FakeOpenAI:
+    def __init__(self, chunks):
+        self.speech = FakeStreamingSpeech(chunks)
+        self.audio = type("Audio", (), {})()
+        self.audio.speech = type("Speech", (), {})()
+        self.audio.speech.with_streaming_response = self.speech
+
+def test_openai_synthesis_streams_pcm_chunks(monkeypatch):
+    fake = FakeOpenAI([b"\x01\x00" * 10, b"\x02\x00" * 10])
+    monkeypatch.setattr(UltraFastTTSService, "openai_client", property(lambda self: fake))
+    monkeypatch.setattr(config, "tts_output_format", "pcm")
+
+    async def collect():
+        return [chunk async for chunk in UltraFastTTSService()._openai_synthesis("Hola")]
+
+    chunks = asyncio.run(collect())
+
+    assert [chunk.data for chunk in chunks] == fake.speech.chunks
+    assert all(chunk.provider == "openai" for chunk in chunks)
+    assert fake.speech.requests[0]["input"] == "Hola"
+    assert fake.speech.requests[0]["response_format"] == "pcm"
+    assert fake.speech.closed
+
+def test_warm_cache_synthesizes_missing_phrases_concurrently(monkeypatch):
+    running = peak = 0
+    synthesized = []
+
+    async def fake_synthesize(self, text, use_streaming=True):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        synthesized.append(text)
+        yield b""
+
+    service = UltraFastTTSService()
+    service.cacheable_phrases = {f"frase {i}" for i in range(6)}
+    monkeypatch.setattr(UltraFastTTSService, "synthesize_speech", fake_synthesize)
+    monkeypatch.setattr(config, "tts_cache_warm_concurrency", 2)
+    monkeypatch.setattr("services.tts_service.tts_cache.get", lambda key: None)
+
+    asyncio.run(service.warm_cache())
+
+    assert sorted(synthesized) == sorted(service.cacheable_phrases)
+    assert peak == 2
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Voice Pipeline Trace Report
+
+Summarizes the per-turn latency traces written by the voice agent when
+TRACE_ENABLED=true. Every stage is reported in milliseconds after the end
+of the caller's speech (VAD end), so speculative turns can show negative
+STT/LLM times.
+
+Usage:
+    python trace_report.py
+    python trace_report.py --file logs/traces.jsonl --call call-573001234567
+    python trace_report.py --status ok cancelled
+"""
+
+import argparse
+import glob
+import json
+import numpy as np
+
+STAGES = ["stt_done", "intent_routed", "llm_first_token", "llm_done", "tts_first_byte", "first_frame_published"]
+PERCENTILES = [50, 90, 95, 99]
+
+def load_traces(path: str) -> list:
+    """Read the trace file and its rotated backups, oldest first"""
+    backups = [name for name in glob.glob(f"{path}.*") if name.rsplit(".", 1)[1].isdigit()]
+    # RotatingFileHandler keeps the newest backup in .1 and the oldest in .N
+    files = sorted(backups, key=lambda name: int(name.rsplit(".", 1)[1]), reverse=True)
+    traces = []
+    for name in files + [path]:
+        try:
+            with open(name) as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        traces.append(json.loads(line))
+        except FileNotFoundError:
+            continue
+    return traces
+
+def print_report(traces: list):
+    calls = {trace["call"] for trace in traces}
+    print("\n" + "="*80)
+    print(f"VOICE PIPELINE LATENCY - {len(traces)} turns across {len(calls)} calls")
+    print("="*80)
+
+    statuses = {}
+    for trace in traces:
+        statuses[trace["status"]] = statuses.get(trace["status"], 0) + 1
+    print("\nTurn status: " + ", ".join(f"{status}={count}" for status, count in sorted(statuses.items())))
+
+    header = f"{'stage (ms after VAD end)':<28}{'n':>7}" + "".join(f"{'p' + str(p):>10}" for p in PERCENTILES)
+    print("\n" + header)
+    print("-" * len(header))
+    for stage in STAGES:
+        values = np.array([
+            trace["ms"][stage] - trace["ms"].get("vad_end", 0.0)
+            for trace in traces
+            if stage in trace["ms"]
+        ])
+        if values.size == 0:
+            print(f"{stage:<28}{0:>7}")
+            continue
+        row = np.percentile(values, PERCENTILES)
+        print(f"{stage:<28}{values.size:>7}" + "".join(f"{value:>10.0f}" for value in row))
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize voice agent latency traces')
+    parser.add_argument('--file', default='logs/traces.jsonl', help='Trace file (rotated backups are included)')
+    parser.add_argument('--call', help='Only include turns from this call (room name)')
+    parser.add_argument('--status', nargs='+', default=['ok'], help='Turn statuses to include (ok, cancelled, discarded, error)')
+
+    args = parser.parse_args()
+
+    traces = [
+        trace for trace in load_traces(args.file)
+        if trace["status"] in args.status and (args.call is None or trace["call"] == args.call)
+    ]
+    if not traces:
+        print(f"No matching traces in {args.file}")
+        return 1
+
+    print_report(traces)
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
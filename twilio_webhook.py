@@ -9,16 +9,124 @@ Usage:
     Add these routes to your main FastAPI app or run as standalone service.
 """
 
-from fastapi import FastAPI, Request, Response
-from fastapi.responses import Response as FastAPIResponse
+import asyncio
 import logging
-from livekit import api
 import os
-from typing import Optional
-import xml.etree.ElementTree as ET
+import time
+from collections import OrderedDict, deque
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, quote
+from xml.sax.saxutils import escape
+
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import Response as FastAPIResponse
+from livekit import api
+
+from src.services.call_events import TERMINAL_STATUSES, CallEventStore, RoomCleaner, events_authorized
+from src.services.twilio_signature import TwilioSignatureValidator
 
 logger = logging.getLogger(__name__)
 
+ROOM_CACHE_TTL_SECS = float(os.getenv('TWILIO_ROOM_CACHE_TTL_SECS', '300'))
+TOKEN_TTL_SECS = int(os.getenv('LIVEKIT_TOKEN_TTL_SECS', '3600'))
+
+# Rendered once; only the stream URL changes per call
+CONNECT_TWIML_HEAD = '''<?xml version="1.0" encoding="UTF-8"?>
+<Response>
+    <Say voice="alice">Connecting you to Laura SDR voice assistant. Please wait a moment.</Say>
+    <Connect>
+        <Stream url="wss://'''
+CONNECT_TWIML_TAIL = '''" />
+    </Connect>
+</Response>'''
+ERROR_TWIML = '''<?xml version="1.0" encoding="UTF-8"?>
+<Response>
+    <Say voice="alice">Sorry, there was an error connecting to the voice assistant. Please try again later.</Say>
+    <Hangup />
+</Response>'''
+
+def parse_form(body: bytes) -> Dict[str, str]:
+    """Parse a urlencoded Twilio webhook body"""
+    return dict(parse_qsl(body.decode('utf-8'), keep_blank_values=True))
+
+class TokenSigner:
+    """Mints LiveKit room-join tokens with the SDK and reuses them for repeated webhooks"""
+
+    def __init__(self, api_key: str, api_secret: str, ttl: int = TOKEN_TTL_SECS, max_cached: int = 1024):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.ttl = ttl
+        self.max_cached = max_cached
+        self._tokens: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+
+    def token(self, room_name: str, identity: str) -> str:
+        key = (room_name, identity)
+        now = time.time()
+        cached = self._tokens.get(key)
+        # Reuse while most of the lifetime is left, so a retried webhook costs nothing
+        if cached is not None and cached[1] - now > self.ttl / 2:
+            return cached[0]
+
+        jwt = (
+            api.AccessToken(self.api_key, self.api_secret)
+            .with_identity(identity)
+            .with_name(f"Twilio Call {identity}")
+            .with_ttl(timedelta(seconds=self.ttl))
+            .with_grants(api.VideoGrants(room_join=True, room=room_name, can_publish=True, can_subscribe=True))
+            .to_jwt()
+        )
+
+        self._tokens[key] = (jwt, now + self.ttl)
+        if len(self._tokens) > self.max_cached:
+            self._tokens.popitem(last=False)
+        return jwt
+
+class RoomCache:
+    """Rooms known to exist, with a TTL; unknown rooms are created in the background"""
+
+    def __init__(self, ttl: float = ROOM_CACHE_TTL_SECS):
+        self.ttl = ttl
+        self._expires: Dict[str, float] = {}
+
+    def known(self, room_name: str) -> bool:
+        expires = self._expires.get(room_name)
+        if expires is None:
+            return False
+        if expires < time.monotonic():
+            del self._expires[room_name]
+            return False
+        return True
+
+    def add(self, room_name: str):
+        self._expires[room_name] = time.monotonic() + self.ttl
+        # Amortized sweep so the set does not grow without bound under burst traffic
+        if len(self._expires) > 4096:
+            now = time.monotonic()
+            self._expires = {room: expires for room, expires in self._expires.items() if expires >= now}
+
+    def discard(self, room_name: str):
+        self._expires.pop(room_name, None)
+
+class PhaseTimings:
+    """Rolling per-phase latency samples for the webhook, reported as percentiles"""
+
+    def __init__(self, window: int = 2048):
+        self.samples: Dict[str, deque] = {}
+        self.window = window
+
+    def record(self, phases: Dict[str, float]):
+        for phase, ms in phases.items():
+            self.samples.setdefault(phase, deque(maxlen=self.window)).append(ms)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        report = {}
+        for phase, values in self.samples.items():
+            ordered = sorted(values)
+            pick = lambda p: round(ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)], 3)
+            report[phase] = {"n": len(ordered), "p50": pick(50), "p90": pick(90), "p99": pick(99), "max": round(ordered[-1], 3)}
+        return report
+
 class TwilioWebhookHandler:
     def __init__(self):
         self.livekit_url = os.getenv('LIVEKIT_URL', 'wss://forceapp-jaadrt7a.livekit.cloud')
@@ -33,10 +141,30 @@ class TwilioWebhookHandler:
             api_key=self.livekit_api_key,
             api_secret=self.livekit_api_secret
         )
+        self.livekit_host = self.livekit_url.replace('wss://', '').replace('ws://', '')
+        self.signer = TokenSigner(self.livekit_api_key, self.livekit_api_secret)
+        self.rooms = RoomCache()
+        self.timings = PhaseTimings()
+        self.events = CallEventStore()
+        self.room_cleaner = RoomCleaner(self._delete_room)
+        self.signature_validator = TwilioSignatureValidator()
+        # Room each inbound call was connected to, so its status callbacks clean up the right room
+        self.call_rooms: "OrderedDict[str, str]" = OrderedDict()
+        self._background = set()
 
     async def handle_incoming_call(self, request: Request) -> FastAPIResponse:
         """Handle incoming Twilio call and connect to LiveKit"""
-        form_data = await request.form()
+        started = time.perf_counter()
+        phases = {}
+        
+        def lap(phase: str):
+            nonlocal started
+            now = time.perf_counter()
+            phases[phase] = (now - started) * 1000
+            started = now
+        
+        form_data = parse_form(await request.body())
+        lap("parse")
         
         # Extract Twilio call information
         call_sid = form_data.get('CallSid')
@@ -47,106 +175,119 @@ class TwilioWebhookHandler:
         # Extract room name from query parameters
         room_name = request.query_params.get('room', f'twilio-call-{call_sid}')
         
+        if call_sid:
+            self.call_rooms[call_sid] = room_name
+            if len(self.call_rooms) > 4096:
+                self.call_rooms.popitem(last=False)
+        
         logger.info(f"Incoming Twilio call: {call_sid} from {from_number} to {to_number}")
         logger.info(f"Call status: {call_status}, Room: {room_name}")
         
         try:
-            # Ensure LiveKit room exists
-            await self._ensure_room_exists(room_name)
+            # Known rooms skip LiveKit entirely; new ones are created off the response path
+            self._ensure_room_exists(room_name)
+            lap("room")
             
             # Generate access token for the call
-            token = await self._generate_access_token(room_name, call_sid)
+            token = self._generate_access_token(room_name, call_sid)
+            lap("token")
             
             # Create TwiML response to connect to LiveKit
             twiml = self._create_connect_twiml(room_name, token)
-            
-            return FastAPIResponse(
-                content=twiml,
-                media_type="application/xml"
-            )
+            lap("twiml")
             
         except Exception as e:
             logger.error(f"Error handling incoming call: {e}")
-            return FastAPIResponse(
-                content=self._create_error_twiml(),
-                media_type="application/xml"
-            )
+            twiml = ERROR_TWIML
+            lap("error")
+        
+        self.timings.record(phases)
+        server_timing = ", ".join(f"{phase};dur={ms:.3f}" for phase, ms in phases.items())
+        return FastAPIResponse(
+            content=twiml,
+            media_type="application/xml",
+            headers={"Server-Timing": server_timing}
+        )
+
+    def _ensure_room_exists(self, room_name: str):
+        """Create the LiveKit room in the background unless it is known to exist"""
+        if self.rooms.known(room_name):
+            return
+        self.rooms.add(room_name)
+        task = asyncio.create_task(self._create_room(room_name))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
 
-    async def _ensure_room_exists(self, room_name: str):
-        """Ensure the LiveKit room exists"""
+    async def _create_room(self, room_name: str):
         try:
             await self.livekit_api.room.create_room(
                 api.CreateRoomRequest(name=room_name)
             )
             logger.info(f"Created or verified room: {room_name}")
         except Exception as e:
-            # Room might already exist, which is fine
-            logger.debug(f"Room creation result: {e}")
+            # Forget the room so the next webhook for it tries again
+            self.rooms.discard(room_name)
+            logger.warning(f"Room creation failed for {room_name}: {e}")
 
-    async def _generate_access_token(self, room_name: str, participant_identity: str) -> str:
+    def _generate_access_token(self, room_name: str, participant_identity: str) -> str:
         """Generate LiveKit access token for the participant"""
-        from livekit import AccessToken, VideoGrants
-        
-        token = AccessToken(self.livekit_api_key, self.livekit_api_secret)
-        token.with_identity(participant_identity)
-        token.with_name(f"Twilio Call {participant_identity}")
-        token.with_grants(VideoGrants(
-            room_join=True,
-            room=room_name,
-            can_publish=True,
-            can_subscribe=True
-        ))
-        
-        return token.to_jwt()
+        return self.signer.token(room_name, participant_identity)
 
     def _create_connect_twiml(self, room_name: str, token: str) -> str:
         """Create TwiML to connect call to LiveKit via WebRTC"""
-        # Create TwiML that connects to LiveKit
-        twiml = f'''<?xml version="1.0" encoding="UTF-8"?>
-<Response>
-    <Say voice="alice">Connecting you to Laura SDR voice assistant. Please wait a moment.</Say>
-    <Connect>
-        <Stream url="wss://{self._get_websocket_url(room_name, token)}" />
-    </Connect>
-</Response>'''
-        return twiml
+        return CONNECT_TWIML_HEAD + escape(self._get_websocket_url(room_name, token), {'"': '&quot;'}) + CONNECT_TWIML_TAIL
 
     def _get_websocket_url(self, room_name: str, token: str) -> str:
         """Get WebSocket URL for LiveKit connection"""
-        # Extract hostname from LiveKit URL
-        livekit_host = self.livekit_url.replace('wss://', '').replace('ws://', '')
-        return f"{livekit_host}/ws?room={room_name}&token={token}"
+        return f"{self.livekit_host}/ws?room={quote(room_name, safe='')}&token={token}"
 
     def _create_error_twiml(self) -> str:
         """Create error TwiML response"""
-        return '''<?xml version="1.0" encoding="UTF-8"?>
-<Response>
-    <Say voice="alice">Sorry, there was an error connecting to the voice assistant. Please try again later.</Say>
-    <Hangup />
-</Response>'''
+        return ERROR_TWIML
 
     async def handle_call_status(self, request: Request) -> FastAPIResponse:
         """Handle Twilio call status updates"""
-        form_data = await request.form()
+        form_data = parse_form(await request.body())
+        
+        # This endpoint deletes rooms, so only Twilio may call it
+        signature = request.headers.get('X-Twilio-Signature')
+        if not self.signature_validator.valid(str(request.url), request.url.path, request.url.query, form_data, signature):
+            logger.warning("Rejected status callback with a missing or invalid Twilio signature")
+            return FastAPIResponse(content="Forbidden", status_code=403, media_type="text/plain")
         
         call_sid = form_data.get('CallSid')
         call_status = form_data.get('CallStatus')
+        # The room comes from the inbound webhook for this call, never from the request
+        room_name = self.call_rooms.get(call_sid, f'twilio-call-{call_sid}')
         
         logger.info(f"Call status update: {call_sid} -> {call_status}")
         
-        # You can add logic here to handle different call statuses
-        # For example, cleanup when call ends
-        if call_status in ['completed', 'failed', 'canceled']:
+        # Persisting and room cleanup both happen off the response path
+        self.events.record(call_sid, call_status, room_name, form_data)
+        if call_sid and call_status in TERMINAL_STATUSES:
             logger.info(f"Call {call_sid} ended with status: {call_status}")
-            # Optionally clean up LiveKit room
+            self.rooms.discard(room_name)
+            self.call_rooms.pop(call_sid, None)
+            self.room_cleaner.schedule(room_name)
         
         return FastAPIResponse(content="OK", media_type="text/plain")
 
+    async def _delete_room(self, room_name: str):
+        await self.livekit_api.room.delete_room(api.DeleteRoomRequest(room=room_name))
+
 
 # FastAPI app instance for standalone usage
 app = FastAPI(title="Twilio-LiveKit Webhook Handler")
 webhook_handler = TwilioWebhookHandler()
 
+@app.on_event("startup")
+async def start_event_store():
+    await webhook_handler.events.start()
+
+@app.on_event("shutdown")
+async def stop_event_store():
+    await webhook_handler.events.stop()
+
 @app.post("/webhook/twilio")
 async def twilio_webhook(request: Request):
     """Handle incoming Twilio calls"""
@@ -157,11 +298,30 @@ async def twilio_status_webhook(request: Request):
     """Handle Twilio call status updates"""
     return await webhook_handler.handle_call_status(request)
 
+@app.get("/webhook/twilio/events")
+async def call_events(
+    call_sid: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    limit: int = 100,
+    authorization: Optional[str] = Header(None)
+):
+    """Recorded status callbacks, newest first; since/until are unix timestamps"""
+    if not events_authorized(authorization):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    events = await webhook_handler.events.query(call_sid, since, until, limit)
+    return {"dropped": webhook_handler.events.dropped, "events": events}
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "twilio-livekit-webhook"}
 
+@app.get("/metrics/webhook")
+async def webhook_metrics():
+    """Per-phase latency percentiles (ms) of the inbound call webhook"""
+    return webhook_handler.timings.report()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file